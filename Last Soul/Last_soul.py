@@ -1,212 +1,134 @@
+import argparse
+import json
 import math
-import pygame
-import pytmx
-import os
-import random
 import time
+START_TIME = time.perf_counter()  # startup benchmark reference, taken before pygame is imported
+import pygame
+from concurrent.futures import ThreadPoolExecutor
+from assets import ANIMATIONS, SOUND_FILES, AnimationPlayer, AssetManager
+from level_compiler import load_compiled_level
+from lighting import Lighting
+from music import MENU_TRACK, MusicPlayer
+from sfx import SoundEffects
+from profiler import FrameProfiler
+from projectiles import FIRE, SOUL, GlowCache
+from render import RENDERERS, NativeLayer, create_display, draw_polygon, draw_scaled
+from settings import (WIDTH, HEIGHT, FPS, TICK_RATE, ZOOM, PLAYER_RADIUS, TIP_DURATION,
+                      UI_FPS, UI_IDLE_FPS, UI_IDLE_TIME, UI_DIRTY_RECTS, TEXT_CACHE_SIZE,
+                      LIGHTING, WAVE_CACHE, WAVE_PHASES, WAVE_MEMORY_BUDGET, NATIVE_WORLD)
+from streaming import LevelStreamer
+from ui import DirtyScreen, Label, TextCache, WaveBorder
+from replay import SEED_RANGE, InputRecorder
+from world import PLAYER_HITBOX, World, inputs_from_keys
 
 
-# --- SETTINGS ---
-WIDTH, HEIGHT = 1024, 720
-FPS = 90
-ZOOM = 3
-GRAVITY = 0.5
-JUMP_STRENGTH = -13
-PLAYER_SPEED = 3
-SOUL_SPEED = 2
-SOUL_DURATION = 2.5 # seconds
 start_menu = True
-collected_mana_ids = set()
-
-# --- LEVEL MANAGEMENT ---
-current_level = 1
-MAX_LEVEL = 3
+MAX_FRAME_TIME = 0.25  # seconds of simulation caught up per frame at most
 
 # --- INIT ---
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
+# only what the start menu needs; audio, sprites and level 1 load behind it (see load_in_background)
+pygame.display.init()
+pygame.font.init()
+display = None  # SurfaceDisplay or TextureDisplay, opened by main() as picked with --renderer
+screen = None   # what everything is drawn on: display.screen
 clock = pygame.time.Clock()
 font_path = "assets/fonts/Pixellari.ttf"
 font = pygame.font.Font(font_path, 48)        # Main font
 small_font = pygame.font.Font(font_path, 24)  # Small font for tips
+debug_font = None  # profiler overlay (F3), created on first use: SysFont scans the system fonts
+
+# --- ASSETS ---
+# animations and sounds load on first use; `python assets.py` prints what each one costs
+assets = AssetManager()
 
 # --- SOUNDS / MUSIC ---
-pygame.mixer.init()
-sounds = {
-    "mana_1": pygame.mixer.Sound("assets/sfx/mana_1.wav") if os.path.exists("assets/sfx/mana_1.wav") else None,
-    "mana_2": pygame.mixer.Sound("assets/sfx/mana_2.wav") if os.path.exists("assets/sfx/mana_2.wav") else None,
-    "death": pygame.mixer.Sound("assets/sfx/death.wav") if os.path.exists("assets/sfx/death.wav") else None,
-    "enter_soul": pygame.mixer.Sound("assets/sfx/enter_soul.wav") if os.path.exists("assets/sfx/enter_soul.wav") else None,
-    "exit_soul": pygame.mixer.Sound("assets/sfx/exit_soul.wav") if os.path.exists("assets/sfx/exit_soul.wav") else None
-}
-
-music1 = pygame.mixer.Sound("assets/music_1.wav") if os.path.exists("assets/music_1.wav") else None
-music2 = pygame.mixer.Sound("assets/music_2.wav") if os.path.exists("assets/music_2.wav") else None
-if music1:
-    music1.play(loops=-1)
-if music2:
-    music2.play(loops=-1)
+# one streamed track at a time, picked per level; started by load_in_background
+music = MusicPlayer()
 
 # --- PLAYER ---
-player_vel_y = 0
-on_ground = False
-player_radius = 7 * ZOOM
-is_soul = False
-mana = 1
-soul_timer = 0
-transforming = False
-transform_frame = 0
-player_frame = 0
-animation_speed = 0.15
-player_x, player_y = WIDTH // 2, HEIGHT // 2
-
-
-# --- LOAD ANIMATIONS ---
-def load_animation(folder, scale_factor=2):
-    frames = []
-    if not os.path.isdir(folder):
-        return frames
-    for filename in sorted(os.listdir(folder)):
-        if filename.endswith(".png"):
-            img = pygame.image.load(os.path.join(folder, filename)).convert_alpha()
-            img = pygame.transform.scale(img, (player_radius * scale_factor, player_radius * scale_factor))
-            frames.append(img)
-    return frames
-
-idle_frames = load_animation("assets/images/animations/player_idle")
-run_frames = load_animation("assets/images/animations/player_run")
-jump_frames = load_animation("assets/images/animations/player_jump")
-soul_frames = []
-for i in range(9):
-    path = f"assets/images/animations/player_soul/transformation_{i}.png"
-    if os.path.exists(path):
-        img = pygame.image.load(path).convert_alpha()
-        # scale_by isn't always available depending on pygame version; use scale if necessary
-        try:
-            img = pygame.transform.scale_by(img, 4)
-        except AttributeError:
-            img = pygame.transform.scale(img, (img.get_width() * 4, img.get_height() * 4))
-        soul_frames.append(img)
+# gameplay state lives in World; these only drive the player's sprite
+player_radius = PLAYER_RADIUS
+player_sprite = AnimationPlayer(assets)  # frame timing comes from each animation's config.json
 
 
-# --- INITIAL PLAYER FRAME ---
-if idle_frames:
-    current_frame = idle_frames[0]
-else:
-    current_frame = pygame.Surface((player_radius*2, player_radius*2), pygame.SRCALPHA)
-    pygame.draw.circle(current_frame, (200,200,200),
-                       (current_frame.get_width()//2,current_frame.get_height()//2),
-                       current_frame.get_width()//2)
+# --- UI SCREENS ---
+# the menu and end screens are mostly static: their still parts are composed once and only
+# the pulsing title/tip and the wave border are redrawn and pushed with display.update(rects)
+ui_screen = None       # DirtyScreen over screen, made with the display
+menu_wave_phase = None
 
-def draw_start_menu():
-    # Background: dark red gradient with subtle waves
-    screen.fill((30, 0, 0))
-    draw_waves(game_time, screen, WIDTH, HEIGHT)
+def compose_start_menu(surface):
+    # Background: dark red
+    surface.fill((30, 0, 0))
 
     # Title
     title = render_text_gradient("LAST SOUL", font, (200, 30, 30), (255, 80, 80))
-    screen.blit(title, (WIDTH//2 - title.get_width()//2, HEIGHT//2 - 150))
+    surface.blit(title, (WIDTH//2 - title.get_width()//2, HEIGHT//2 - 150))
 
     # Instructions
-    instr1 = small_font.render("Press ENTER to start", True, (255, 180, 180))
-    screen.blit(instr1, (WIDTH//2 - instr1.get_width()//2, HEIGHT//2))
+    instr1 = render_text("Press ENTER to start", small_font, (255, 180, 180))
+    surface.blit(instr1, (WIDTH//2 - instr1.get_width()//2, HEIGHT//2))
+
+    instr2 = render_text("Press ESC to quit", small_font, (180, 100, 100))
+    surface.blit(instr2, (WIDTH//2 - instr2.get_width()//2, HEIGHT//2 + 40))
 
-    instr2 = small_font.render("Press ESC to quit", True, (180, 100, 100))
-    screen.blit(instr2, (WIDTH//2 - instr2.get_width()//2, HEIGHT//2 + 40))
+def draw_start_menu():
+    global menu_wave_phase
+    fresh = ui_screen.begin("menu", compose_start_menu)
+
+    # subtle waves; the cached border only changes when it moves on to its next phase
+    phase = wave_border.phase(game_time) if WAVE_CACHE else game_time
+    if phase != menu_wave_phase and not fresh:
+        ui_screen.restore(wave_border.rects)
+    menu_wave_phase = phase
+    draw_waves(game_time, screen, WIDTH, HEIGHT)
 
     # Optional tip with pulse effect
     t = pygame.time.get_ticks() / 1000
     pulse = 1.0 + 0.05 * math.sin(t * 3)
-    tip = small_font.render("Use DOWN ARROW to transform into your soul", True, (255, 100, 100))
-    tip = pygame.transform.rotozoom(tip, 0, pulse)
-    screen.blit(tip, (WIDTH//2 - tip.get_width()//2, HEIGHT - 80))
-
-
-
-def load_level(level_num):
-    global tmx_data, player_x, player_y, mana_objects, door_objects, TILE_WIDTH, TILE_HEIGHT
-    tmx_data = pytmx.load_pygame(f"assets/maps/level_{level_num}.tmx")
-    TILE_WIDTH = tmx_data.tilewidth * ZOOM
-    TILE_HEIGHT = tmx_data.tileheight * ZOOM
-
-    # spawn point from layer
-    player_x, player_y = WIDTH // 2, HEIGHT // 2
-    for layer in tmx_data.visible_layers:
-        if isinstance(layer, pytmx.TiledObjectGroup) and getattr(layer, "name", "") == "spawn_point":
-            for obj in layer:
-                # object coordinates in Tiled are in pixels already
-                player_x = obj.x * ZOOM
-                player_y = obj.y * ZOOM
-
-    mana_objects = []
-    door_objects = []
-    for layer in tmx_data.visible_layers:
-        if isinstance(layer, pytmx.TiledObjectGroup):
-            if getattr(layer, "name", "") == "mana":
-                for obj in layer:
-                    rect = pygame.Rect(obj.x * ZOOM, obj.y * ZOOM, obj.width * ZOOM, obj.height * ZOOM)
-                    if id(rect) not in collected_mana_ids:  # only add if not collected
-                        mana_objects.append(rect)
-            elif getattr(layer, "name", "") == "door":
-                for obj in layer:
-                    rect = pygame.Rect(obj.x * ZOOM, obj.y * ZOOM, obj.width * ZOOM, obj.height * ZOOM)
-                    door_objects.append(rect)
-    # set globals
-    globals()["mana_objects"] = mana_objects
-    globals()["door_objects"] = door_objects
-    # return spawn pos (player_x/player_y are global anyway)
-    return player_x, player_y
-
-# initial load
-load_level(current_level)
-
-# --- FUNCTIONS ---
-def get_solid_tiles():
-    solid = []
-    for layer in tmx_data.visible_layers:
-        if isinstance(layer, pytmx.TiledTileLayer):
-            for x, y, gid in layer:
-                tile = tmx_data.get_tile_image_by_gid(gid)
-                if tile:
-                    props = tmx_data.get_tile_properties_by_gid(gid) or {}
-                    if props and props.get("collide"):
-                        rect = pygame.Rect(
-                            x * tmx_data.tilewidth * ZOOM,
-                            y * tmx_data.tileheight * ZOOM,
-                            tmx_data.tilewidth * ZOOM,
-                            tmx_data.tileheight * ZOOM
-                        )
-                        solid.append(rect)
-    return solid
-
-
-# --- YOU WON UI state ---
-you_won = False
-you_won_alpha = 0.0
-YOU_WON_FADE_SPEED = 200.0  # same as game over
-
-def draw_you_won():
-    overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-    overlay.fill((0, 0, 0, int(you_won_alpha)))
-    screen.blit(overlay, (0, 0))
-
-    box_w, box_h = 620, 180
-    box_x = (WIDTH - box_w) // 2
-    box_y = (HEIGHT - box_h) // 2
-    pygame.draw.rect(screen, (20, 30, 40), (box_x, box_y, box_w, box_h), border_radius=10)
-    pygame.draw.rect(screen, (50, 120, 255), (box_x+2, box_y+2, box_w-4, box_h-4), 3, border_radius=10)
+    tip = render_text("Use DOWN ARROW to transform into your soul", small_font, (255, 100, 100))
+    ui_screen.add(draw_scaled(screen, tip, pulse, WIDTH//2, HEIGHT - 80))
+
+
+# --- END SCREENS ---
+END_BOX = pygame.Rect((WIDTH - 620) // 2, (HEIGHT - 180) // 2, 620, 180)
+
+def build_end_box(fill, border, info, hint):
+    # central box with its two lines of text, composed once per end screen
+    box = pygame.Surface(END_BOX.size, pygame.SRCALPHA)
+    pygame.draw.rect(box, fill, box.get_rect(), border_radius=10)
+    pygame.draw.rect(box, border, box.get_rect().inflate(-4, -4), 3, border_radius=10)
+    box.blit(info, (WIDTH//2 - END_BOX.x - info.get_width()//2, 80))
+    box.blit(hint, (WIDTH//2 - END_BOX.x - hint.get_width()//2, 110))
+    return box
+
+def draw_end_screen(key, alpha, fill, border, title, info, hint):
+    box = text_cache.get(("end_box", key), lambda: build_end_box(fill, border, info, hint))
+    if alpha < 255:
+        # overlay fade: darkens what is already on screen a little more every frame
+        fade_surface.set_alpha(int(alpha))
+        screen.blit(fade_surface, (0, 0))
+        screen.blit(box, END_BOX)
+        ui_screen.redraw_all()
+    else:
+        # fully faded: black plus the box never changes again
+        def compose(surface):
+            surface.fill((0, 0, 0))
+            surface.blit(box, END_BOX)
+        ui_screen.begin(key, compose)
 
+    # title with pulsing effect
     t = pygame.time.get_ticks() / 1000.0
     pulse = 1.0 + 0.07 * math.sin(t * 4.0)
-    title = render_text_gradient("YOU WON!", font, (100, 200, 255), (180, 255, 255))
-    title = pygame.transform.rotozoom(title, 0, pulse)
-    screen.blit(title, (WIDTH//2 - title.get_width()//2, box_y + 20))
-
-    info = small_font.render("Congratulations! Press R to restart or ESC to quit.", True, (220, 220, 220))
-    screen.blit(info, (WIDTH//2 - info.get_width()//2, box_y + 80))
+    ui_screen.add(draw_scaled(screen, title, pulse, WIDTH//2, END_BOX.y + 20))
 
-    hint = small_font.render("Restart reloads the first level and clears projectiles.", True, (160, 160, 160))
-    screen.blit(hint, (WIDTH//2 - hint.get_width()//2, box_y + 110))
+# --- YOU WON UI ---
+def draw_you_won():
+    draw_end_screen(
+        "you_won", world.you_won_alpha, (20, 30, 40), (50, 120, 255),
+        render_text_gradient("YOU WON!", font, (100, 200, 255), (180, 255, 255)),
+        render_text("Congratulations! Press R to restart or ESC to quit.", small_font, (220, 220, 220)),
+        render_text("Restart reloads the first level and clears projectiles.", small_font, (160, 160, 160)))
 
 
 def advance(loc, angle, distance):
@@ -221,166 +143,52 @@ def render_mana(loc, size=[6, 8], color1=(255, 255, 255), color2=(12, 230, 242))
             game_time / 30 + i / 8 * math.pi * 2,
             math.sin((game_time * math.sqrt(i)) / 20) * size[0] + size[1]
         ))
-    pygame.draw.polygon(screen, color1, points)
-    pygame.draw.polygon(screen, color2, points, 1)
-
-
-def spawn_projectile(target_x, target_y, min_dist=180, max_dist=260, speed_base=3.0):
-    angle = random.uniform(0, math.tau)  # spawn direction
-    dist = random.uniform(min_dist, max_dist)
-    spawn_x = target_x + math.cos(angle) * dist
-    spawn_y = target_y + math.sin(angle) * dist
-
-    # calculate velocity toward the player's position at spawn time
-    dx = target_x - spawn_x
-    dy = target_y - spawn_y
-    length = math.hypot(dx, dy) or 1.0
-    dx /= length
-    dy /= length
-
-    # make them slightly faster and a bit varied
-    speed = speed_base * 1.3 * random.uniform(0.9, 1.15)  # ~30% faster
-    proj = {
-        "pos": [spawn_x, spawn_y],
-        "vel": [dx * speed, dy * speed],
-        "radius": 5
-    }
-    projectiles.append(proj)
-
-def update_projectiles(player_rect, camera_x, camera_y):
-
-    world_screen_rect = pygame.Rect(camera_x - 32, camera_y - 32, WIDTH + 64, HEIGHT + 64)  # margin
-    for proj in projectiles[:]:
-        proj["pos"][0] += proj["vel"][0]
-        proj["pos"][1] += proj["vel"][1]
-
-        rect = pygame.Rect(proj["pos"][0] - proj["radius"], proj["pos"][1] - proj["radius"],
-                           proj["radius"] * 2, proj["radius"] * 2)
-
-        # collision with player
-        if rect.colliderect(player_rect):
-            # signal hit to caller
-            return "hit", proj
-
-        # remove if far off-screen
-        if not world_screen_rect.colliderect(rect):
-            try:
-                projectiles.remove(proj)
-            except ValueError:
-                pass
-    return None, None
+    draw_polygon(screen, color1, points)
+    draw_polygon(screen, color2, points, 1)
+
 
 # --- DRAW WAVES ---
+wave_border = WaveBorder(WIDTH, HEIGHT, phases=WAVE_PHASES, memory_budget=WAVE_MEMORY_BUDGET, cached=WAVE_CACHE)
+
 def draw_waves(game_time, screen, WIDTH, HEIGHT):
-    BORDER_SIZE = 80
-    COLOR = (10, 5, 8)
-    POINTS = 7
-
-    # top wave
-    top_points = [[0, BORDER_SIZE]]
-    for i in range(POINTS):
-        x = WIDTH / POINTS * (i + 1)
-        y = BORDER_SIZE + math.sin((game_time + i * 200) / 20) * 60
-        top_points.append([x, y])
-    top_points += [[WIDTH, BORDER_SIZE], [WIDTH, 0], [0, 0]]
-    surf = pygame.Surface((WIDTH, BORDER_SIZE), pygame.SRCALPHA)
-    pygame.draw.polygon(surf, COLOR, top_points)
-    screen.blit(surf, (0, 0))
-
-    # bottom wave
-    bottom_points = [[0, 0]]
-    for i in range(POINTS):
-        x = WIDTH / POINTS * (i + 1)
-        y = 0 - math.sin((game_time + i * 200) / 20) * 60
-        bottom_points.append([x, y])
-    bottom_points += [[WIDTH, 0], [WIDTH, BORDER_SIZE], [0, BORDER_SIZE]]
-    surf = pygame.Surface((WIDTH, BORDER_SIZE), pygame.SRCALPHA)
-    pygame.draw.polygon(surf, COLOR, bottom_points)
-    screen.blit(surf, (0, HEIGHT - BORDER_SIZE))
-
-    # left wave
-    left_points = [[BORDER_SIZE, 0]]
-    for i in range(POINTS):
-        y = HEIGHT / POINTS * (i + 1)
-        x = BORDER_SIZE + math.sin((game_time + i * 200) / 20) * 60
-        left_points.append([x, y])
-    left_points += [[BORDER_SIZE, HEIGHT], [0, HEIGHT], [0, 0]]
-    surf = pygame.Surface((BORDER_SIZE, HEIGHT), pygame.SRCALPHA)
-    pygame.draw.polygon(surf, COLOR, left_points)
-    screen.blit(surf, (0, 0))
-
-    # right wave
-    right_points = [[0, 0]]
-    for i in range(POINTS):
-        y = HEIGHT / POINTS * (i + 1)
-        x = 0 - math.sin((game_time + i * 200) / 20) * 60
-        right_points.append([x, y])
-    right_points += [[0, HEIGHT], [BORDER_SIZE, HEIGHT], [BORDER_SIZE, 0]]
-    surf = pygame.Surface((BORDER_SIZE, HEIGHT), pygame.SRCALPHA)
-    pygame.draw.polygon(surf, COLOR, right_points)
-    screen.blit(surf, (WIDTH - BORDER_SIZE, 0))
+    wave_border.draw(screen, game_time)
 
 # --- DRAW MAP ---
-def draw_map(camera_x, camera_y):
-    for layer in tmx_data.visible_layers:
-        if isinstance(layer, pytmx.TiledTileLayer):
-            for x, y, gid in layer:
-                tile = tmx_data.get_tile_image_by_gid(gid)
-                if tile:
-                    tile = pygame.transform.scale(
-                        tile, (tmx_data.tilewidth * ZOOM, tmx_data.tileheight * ZOOM)
-                    )
-                    screen.blit(tile, (x * tmx_data.tilewidth * ZOOM - camera_x,
-                                       y * tmx_data.tileheight * ZOOM - camera_y))
-        elif isinstance(layer, pytmx.TiledObjectGroup):
-            if getattr(layer, "name", "") == "mana":
-                continue
-            for obj in layer:
-                if hasattr(obj, "gid") and obj.gid:
-                    image = tmx_data.get_tile_image_by_gid(obj.gid)
-                    if image:
-                        image = pygame.transform.scale(
-                            image, (int(obj.width * ZOOM), int(obj.height * ZOOM))
-                        )
-                        screen.blit(image, (obj.x * ZOOM - camera_x, obj.y * ZOOM - camera_y))
-
-# --- GAME OVER UI state ---
-game_over = False
-game_over_alpha = 0.0  # 0..255 for overlay fade
-GAME_OVER_FADE_SPEED = 200.0  # alpha units per second
+# the background and map are drawn at the tiles' native size and scaled up once per frame
+# (surface backend only; the texture backend scales on the GPU anyway)
+world_layer = None   # NativeLayer, made with the display when NATIVE_WORLD applies
+BACKGROUND = (70, 14, 43)
 
+def draw_map(camera_x, camera_y):
+    # only the baked chunks overlapping the camera are blitted
+    if world_layer is None:
+        screen.fill(BACKGROUND)
+        return world.level.render.draw(screen, camera_x, camera_y)
+    blits = 0
+    position = world_layer.begin(camera_x, camera_y, world.level)
+    if position is not None:
+        world_layer.surface.fill(BACKGROUND)
+        blits = world.level.native_render.draw(world_layer.surface, *position)
+    world_layer.present(screen)
+    return blits + 1
+
+# --- GAME OVER UI ---
 def draw_game_over():
-    # overlay fade
-    overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-    overlay.fill((0, 0, 0, int(game_over_alpha)))
-    screen.blit(overlay, (0, 0))
-
-    # central box
-    box_w, box_h = 620, 180
-    box_x = (WIDTH - box_w) // 2
-    box_y = (HEIGHT - box_h) // 2
-    pygame.draw.rect(screen, (20, 20, 30), (box_x, box_y, box_w, box_h), border_radius=10)
-    pygame.draw.rect(screen, (60, 10, 10), (box_x+2, box_y+2, box_w-4, box_h-4), 3, border_radius=10)
-
-    # text with pulsing effect
-    t = pygame.time.get_ticks() / 1000.0
-    pulse = 1.0 + 0.07 * math.sin(t * 4.0)
-    title = font.render("GAME OVER", True, (255, 80, 80))
-    title = pygame.transform.rotozoom(title, 0, pulse)
-    screen.blit(title, (WIDTH//2 - title.get_width()//2, box_y + 20))
-
-    info = small_font.render("You died. Press R to retry or ESC to quit.", True, (220, 220, 220))
-    screen.blit(info, (WIDTH//2 - info.get_width()//2, box_y + 80))
-
-    # subtle hint
-    hint = small_font.render("Retry reloads the current level and clears projectiles.", True, (160, 160, 160))
-    screen.blit(hint, (WIDTH//2 - hint.get_width()//2, box_y + 110))
+    draw_end_screen(
+        "game_over", world.game_over_alpha, (20, 20, 30), (60, 10, 10),
+        render_text("GAME OVER", font, (255, 80, 80)),
+        render_text("You died. Press R to retry or ESC to quit.", small_font, (220, 220, 220)),
+        # subtle hint
+        render_text("Retry reloads the current level and clears projectiles.", small_font, (160, 160, 160)))
 
 # --- FONTS / GRADIENT FUNCTION ---
-def render_text_gradient(text, font, color_top, color_bottom):
+text_cache = TextCache(max_size=TEXT_CACHE_SIZE)
+
+def build_text_gradient(text, font, color_top, color_bottom):
     # render solid surface
     surf = font.render(text, True, (255,255,255))
-    surf = surf.convert_alpha()
+    if pygame.display.get_surface():
+        surf = surf.convert_alpha()
     width, height = surf.get_size()
     # create gradient
     gradient = pygame.Surface((width, height), pygame.SRCALPHA)
@@ -393,20 +201,28 @@ def render_text_gradient(text, font, color_top, color_bottom):
     surf.blit(gradient, (0,0), special_flags=pygame.BLEND_RGBA_MULT)
     return surf
 
+def render_text_gradient(text, font, color_top, color_bottom):
+    # rendered once per (text, font, colors), then served from the LRU cache
+    key = ("gradient", text, font, color_top, color_bottom)
+    return text_cache.get(key, lambda: build_text_gradient(text, font, color_top, color_bottom))
+
+def render_text(text, font, color):
+    return text_cache.get(("solid", text, font, color), lambda: font.render(text, True, color))
+
+# the HUD label only re-renders when the mana count changes
+mana_label = Label(lambda value: render_text_gradient(f"Mana: {value}", font, (0,180,255), (180,255,255)))
+
 
 # --- INITIAL PLAYER FRAME ---
-if idle_frames:
-    current_frame = idle_frames[0]
-else:
-    current_frame = pygame.Surface((player_radius*2, player_radius*2), pygame.SRCALPHA)
-    pygame.draw.circle(current_frame, (200,200,200),
-                       (current_frame.get_width()//2,current_frame.get_height()//2),
-                       current_frame.get_width()//2)
+def initial_player_frame():
+    global current_anchor
+    animation = assets.animation("player_idle")
+    frame = animation.frame_at(0.0)
+    current_anchor = sprite_anchor(frame, animation)
+    return frame
 
 
 # --- PROJECTILES ---
-projectiles=[]
-
 def create_flame_projectile(radius):
     """Creates a projectile surface with a fiery gradient and slight glow."""
     surf = pygame.Surface((radius*2, radius*2), pygame.SRCALPHA)
@@ -455,318 +271,370 @@ def add_glow(base_surf, glow_color, glow_size=12, pulse=1.0):
 projectile_core = create_flame_projectile(7)
 soul_core = create_blue_flame(8)
 
-projectile_img = add_glow(projectile_core, (255, 100, 0))   # orange glow
-soul_flame_img = add_glow(soul_core, (100, 200, 255))      # blue glow
-
-
-# --- EVENT FLAGS ---
-event_start_pause=True
-event_after_first_soul=False
-first_soul_done=False
-thought_active = False
-thought_start_time = 0
-THOUGHT_DURATION = 3.0  # seconds
-thought_shown_after_first_soul = False
-
-
-# --- GAME LOOP ---
-game_time=0
-running=True
-spawn_timer=0.0
-SPAWN_INTERVAL=1.7
-MIN_SPAWN_COUNT=10
-MAX_SPAWN_COUNT=17
-
-while running:
-    dt = clock.tick(FPS)/1000.0
-    for event in pygame.event.get():
-        if event.type==pygame.QUIT:
-            running=False
-
-    keys = pygame.key.get_pressed()
-
-    # --- START MENU ---
-    if start_menu:
-        draw_start_menu()
-        pygame.display.flip()
-
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_RETURN]:
-            start_menu = False  # start the game
-            event_start_pause = True  # trigger the first pause/intro
-        if keys[pygame.K_ESCAPE]:
-            running = False
-        game_time += 1
-        continue
-
-    # --- GAME OVER ---
-    if game_over:
-        if keys[pygame.K_r]:
-            game_over=False
-            game_over_alpha=0.0
-            load_level(current_level)
-            projectiles.clear()
-            is_soul=False
-            transforming=False
-            soul_timer=0
-            player_x,player_y = globals().get("player_x",player_x), globals().get("player_y",player_y)
-            if music1: music1.play(loops=-1)
-            if music2: music2.play(loops=-1)
-            continue
-        if keys[pygame.K_ESCAPE]:
-            running=False
-        game_over_alpha=min(255.0, game_over_alpha+GAME_OVER_FADE_SPEED*dt)
-        draw_game_over()
-        pygame.display.flip()
-        continue
-
-    # --- START PAUSE ---
-    if event_start_pause:
-        dx=dy=0
-        player_vel_y=0
-        on_ground=False
-        camera_x, camera_y = player_x-WIDTH//2, player_y-HEIGHT//2
-        screen.fill((70,14,43))
-        draw_map(camera_x,camera_y)
-        draw_waves(game_time,screen,WIDTH,HEIGHT)
-        screen.blit(current_frame,(player_x-camera_x-current_frame.get_width()//2,
-                                   player_y-camera_y-current_frame.get_height()//2))
-        msg = render_text_gradient("Press DOWN ARROW to transform into your soul", small_font,(0,180,255),(180,255,255))
-        screen.blit(msg,(WIDTH//2-msg.get_width()//2, HEIGHT//2-50))
-        pygame.display.flip()
-        if keys[pygame.K_DOWN] and mana>0:
-            transforming=True
-            transform_frame=0
-            mana-=1
-            event_start_pause=False
-            first_soul_done=True
-            if sounds.get("enter_soul"):
-                try: sounds["enter_soul"].play()
-                except Exception: pass
-        game_time+=1
-        continue
-
-    # --- NORMAL INPUT ---
-    dx=dy=0
-    if not transforming:
-        if is_soul:
-            if keys[pygame.K_a]: dx -= SOUL_SPEED
-            if keys[pygame.K_d]: dx += SOUL_SPEED
-            if keys[pygame.K_w]: dy -= SOUL_SPEED
-            if keys[pygame.K_s]: dy += SOUL_SPEED
-
-            if time.time() - soul_timer > SOUL_DURATION:
-                is_soul = False
-
-                # Trigger thought after first soul ends
-                if first_soul_done and not thought_shown_after_first_soul:
-                    thought_active = True
-                    thought_start_time = time.time()
-                    thought_shown_after_first_soul = True
-
-
-        else:
-            if keys[pygame.K_a]: dx-=PLAYER_SPEED
-            if keys[pygame.K_d]: dx+=PLAYER_SPEED
-            if keys[pygame.K_SPACE] and on_ground:
-                player_vel_y=JUMP_STRENGTH
-                on_ground=False
-            player_vel_y+=GRAVITY
-            dy=player_vel_y
-            if keys[pygame.K_DOWN] and mana > 0:
-                transforming = True
-                transform_frame = 0
-                mana -= 1
-                if sounds.get("enter_soul"):
-                    try:
-                        sounds["enter_soul"].play()
-                    except Exception:
-                        pass
-
-                # Trigger thought if mana now zero (first transformation used)
-                if mana == 0:
-                    thought_active = True
-                    thought_start_time = time.time()
-
-    # --- COLLISIONS ---
-    solid_tiles=get_solid_tiles()
-    if is_soul and soul_frames:
-        hitbox_width, hitbox_height = soul_frames[0].get_width()//2, soul_frames[0].get_height()//2
+# glow sprites for every pulse level are rendered once instead of per projectile per frame
+GLOW_LEVELS = 24
+glow_cache = GlowCache(levels=GLOW_LEVELS, low=0.2, high=1.0)
+
+def build_glows():
+    global projectile_img, soul_flame_img
+    glow_cache.add(FIRE, lambda pulse: add_glow(projectile_core, (255, 100, 0), glow_size=12, pulse=pulse))  # orange glow
+    glow_cache.add(SOUL, lambda pulse: add_glow(soul_core, (100, 200, 255), glow_size=12, pulse=pulse))      # blue glow
+    projectile_img = glow_cache.get(FIRE, 1.0)
+    soul_flame_img = glow_cache.get(SOUL, 1.0)
+
+
+# --- DEFERRED LOADING ---
+def load_in_background():
+    """Everything the start menu can do without: audio, sprites and projectile glows."""
+    try:
+        pygame.mixer.init()
+    except pygame.error:
+        pass  # no audio device: the game runs silently, every sound path checks mixer.get_init()
+    music.play(MENU_TRACK)
+    for name in SOUND_FILES:
+        assets.sound(name)
+    for name in ANIMATIONS:
+        assets.animation(name)
+    build_glows()
+
+
+# --- SOUND EVENTS ---
+sfx = SoundEffects(assets)
+
+def play_events():
+    # the world only records what happened during its steps; sounds are played here
+    if "level_loaded" in world.events:
+        music.play_level(world.current_level)  # keeps playing when the track is the same
+    for outcome, count in sfx.play_all(world.events).items():
+        profiler.count("sfx." + outcome, count)
+    world.events.clear()
+
+
+# --- PLAYER SPRITE ---
+current_anchor = (0, 0)  # top-left of current_frame relative to the player's centre
+
+def sprite_anchor(frame, animation=None, flipped=False):
+    """Centred, or for an animation with frames placed by its config.json offset: the sprite's
+    top-left sits that far up and left of the hitbox's top-left (mirrored with the frame)."""
+    if animation is None or not animation.frames:
+        return (-(frame.get_width() // 2), -(frame.get_height() // 2))
+    hitbox_w, hitbox_h = PLAYER_HITBOX
+    offset_x, offset_y = animation.offset
+    if flipped:
+        x = hitbox_w - hitbox_w // 2 + offset_x - frame.get_width()
     else:
-        hitbox_width, hitbox_height = int(player_radius*1.6), int(player_radius*1.8)
-    player_rect=pygame.Rect(player_x-hitbox_width//2, player_y-hitbox_height//2, hitbox_width, hitbox_height)
-
-    player_rect.x+=dx
-    for tile in solid_tiles:
-        if player_rect.colliderect(tile):
-            if dx>0: player_rect.right=tile.left
-            if dx<0: player_rect.left=tile.right
-
-    player_rect.y+=dy
-    on_ground=False
-    for tile in solid_tiles:
-        if player_rect.colliderect(tile):
-            if dy>0:
-                player_rect.bottom=tile.top
-                if not is_soul: player_vel_y=0
-                on_ground=True
-            if dy<0:
-                player_rect.top=tile.bottom
-                if not is_soul: player_vel_y=0
-
-    player_x,player_y=player_rect.centerx, player_rect.centery
-    camera_x, camera_y=player_x-WIDTH//2, player_y-HEIGHT//2
-
-    # --- MANA COLLECTION ---
-    for mana_rect in list(globals().get("mana_objects", [])):
-        if player_rect.colliderect(mana_rect):
-            mana += 1
-            if sounds.get("mana_1"):
-                try:
-                    sounds["mana_1"].play()
-                except Exception:
-                    pass
-            if sounds.get("mana_2"):
-                try:
-                    sounds["mana_2"].play()
-                except Exception:
-                    pass
-            try:
-                globals()["mana_objects"].remove(mana_rect)
-                collected_mana_ids.add(id(mana_rect))  # track collected mana
-            except Exception:
-                pass
-
-    # --- DOOR ---
-    for door_rect in list(globals().get("door_objects", [])):
-        if player_rect.colliderect(door_rect):
-            current_level += 1
-            if current_level > MAX_LEVEL:
-                you_won = True  # trigger the "You Won" screen
-            else:
-                load_level(current_level)
-
-    # --- YOU WON SCREEN ---
-    if you_won:
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_r]:
-            you_won = False
-            you_won_alpha = 0.0
-            current_level = 1
-            load_level(current_level)
-            projectiles.clear()
-            is_soul = False
-            transforming = False
-            soul_timer = 0
-        if keys[pygame.K_ESCAPE]:
-            running = False
-
-        you_won_alpha = min(255.0, you_won_alpha + YOU_WON_FADE_SPEED * dt)
-        draw_you_won()
-        pygame.display.flip()
-        game_time += 1
-        continue
-
-    # --- SPAWN PROJECTILES ---
-    spawn_timer+=dt
-    if spawn_timer>=SPAWN_INTERVAL:
-        spawn_timer=0.0
-        count=random.randint(MIN_SPAWN_COUNT,MAX_SPAWN_COUNT)
-        for _ in range(count):
-            spawn_projectile(player_x,player_y,min_dist=400,max_dist=600,speed_base=2.0)
-
-    # --- UPDATE PROJECTILES ---
-    hit_result, hit_proj = update_projectiles(player_rect,camera_x,camera_y)
-    if hit_result=="hit":
-        if sounds.get("death"):
-            try: sounds["death"].play()
-            except Exception: pass
-        if is_soul:
-            is_soul=False
-            transforming=False
-            soul_timer=0
-            projectiles.remove(hit_proj)
-            if sounds.get("exit_soul"):
-                try: sounds["exit_soul"].play()
-                except Exception: pass
-        else:
-            game_over=True
-            game_over_alpha=0.0
-            projectiles.clear()
-
-    # --- TRANSFORMATION ---
-    if transforming:
-        if soul_frames and int(transform_frame)<len(soul_frames):
-            current_frame=soul_frames[int(transform_frame)]
-            transform_frame+=0.25
-        else:
-            transforming=False
-            is_soul=True
-            soul_timer=time.time()
-            current_frame=soul_frames[-1] if soul_frames else pygame.Surface((player_radius,player_radius))
-            if sounds.get("enter_soul"):
-                try: sounds["enter_soul"].play()
-                except Exception: pass
-            if first_soul_done and not event_after_first_soul:
-                event_after_first_soul=True
-                tip_start_time=time.time()
-    elif is_soul:
-        current_frame = soul_flame_img if soul_frames else pygame.Surface((player_radius,player_radius))
+        x = -(hitbox_w // 2) - offset_x
+    return (x, -(hitbox_h // 2) - offset_y)
+
+def update_player_frame():
+    # called once per tick; nothing here allocates: mirrored frames and the placeholder are made at load
+    global current_frame, current_anchor
+    player = world.player
+    soul_frames = assets.animation("player_soul").frames
+    if player.transforming:
+        if soul_frames:
+            current_frame=soul_frames[min(int(player.transform_frame), len(soul_frames)-1)]
+            current_anchor = sprite_anchor(current_frame)
+    elif player.is_soul:
+        current_frame = soul_flame_img if soul_frames else assets.placeholder((player_radius,player_radius))
+        current_anchor = sprite_anchor(current_frame)
     else:
-        if not on_ground: frames=jump_frames
-        elif dx!=0: frames=run_frames
-        else: frames=idle_frames
-        if frames:
-            player_frame=(player_frame+animation_speed)%len(frames) if len(frames)>1 else 0
-            current_frame=frames[int(player_frame)]
-        else:
-            current_frame=pygame.Surface((player_radius*2,player_radius*2),pygame.SRCALPHA)
-            pygame.draw.circle(current_frame,(200,200,200),(current_frame.get_width()//2,current_frame.get_height()//2),current_frame.get_width()//2)
-    if dx<0 and not transforming and not is_soul:
-        current_frame=pygame.transform.flip(current_frame,True,False)
-
-    # --- DRAW ---
-    screen.fill((70,14,43))
-    draw_map(camera_x,camera_y)
+        if not player.on_ground: name="player_jump"
+        elif player.dx!=0: name="player_run"
+        else: name="player_idle"
+        flipped = player.dx<0
+        current_frame = player_sprite.update(name, 1.0 / TICK_RATE, flipped=flipped)
+        current_anchor = sprite_anchor(current_frame, assets.animation(name), flipped)
+
+
+# --- DRAW ---
+VIEW_MARGIN = 16  # px around the screen still drawn, covers the mana sparkle's reach
+
+def view_rect(camera_x, camera_y, margin=VIEW_MARGIN):
+    # the part of the world that ends up on screen
+    return pygame.Rect(camera_x - margin, camera_y - margin, WIDTH + margin * 2, HEIGHT + margin * 2)
+
+# --- LIGHTING ---
+# static lamps are baked per level when it loads; these follow what moves: (radius px, color)
+PLAYER_LIGHT = (150, (150, 130, 120))
+SOUL_LIGHT = (220, (100, 200, 255))
+MANA_LIGHT = (70, (60, 200, 230))
+PROJECTILE_LIGHTS = {FIRE: (60, (255, 120, 40)), SOUL: (60, (100, 200, 255))}
+lighting = Lighting((WIDTH, HEIGHT), enabled=LIGHTING)  # F4 toggles it
+
+def load_lit_level(level_num):
+    # runs on the streaming thread, so the bake never stalls a frame
+    level = load_compiled_level(level_num, ZOOM)
+    level.lightmap = lighting.bake(level)
+    if world_layer is not None:
+        # the full-size chunks are never drawn in this mode; the streamer would keep them for nothing
+        level.native_render = level.render.scaled_down(ZOOM)
+        level.render = None
+    return level
+
+def draw_lights(camera_x, camera_y, player_x, player_y, mana_centers, alpha):
+    if not lighting.enabled:
+        return
+    lighting.begin(world.level.lightmap, camera_x, camera_y)
+    lighting.add(player_x, player_y, *(SOUL_LIGHT if world.player.is_soul else PLAYER_LIGHT))
+    for x, y in mana_centers:
+        lighting.add(x, y, *MANA_LIGHT)
+    positions, kinds = world.projectiles.interpolated(alpha), world.projectiles.kinds()
+    for kind, light in PROJECTILE_LIGHTS.items():
+        lighting.add_many(positions[kinds == kind], *light)
+    profiler.count("lights", lighting.draw(screen))
+    profiler.lap("draw_lighting")
+
+def draw_world(alpha):
+    # the player and camera are drawn between the last two simulation steps
+    player_x, player_y = world.interpolated_position(alpha)
+    camera_x, camera_y = round(player_x)-WIDTH//2, round(player_y)-HEIGHT//2
+    profiler.count("blits", draw_map(camera_x,camera_y))
+    profiler.lap("draw_map")
     draw_waves(game_time,screen,WIDTH,HEIGHT)
-    if first_soul_done and thought_active:
-        if time.time() - thought_start_time < THOUGHT_DURATION:
-            thought_msg = render_text_gradient(
-                "I need mana to do that again",
-                small_font,
-                (0, 180, 255),
-                (180, 255, 255)
-            )
-            screen.blit(thought_msg, (WIDTH // 2 - thought_msg.get_width() // 2, HEIGHT // 2 - 100))
-        else:
-            thought_active = False
+    profiler.count("blits", 4)
+    profiler.lap("draw_waves")
 
-    for mana_rect in globals().get("mana_objects",[]):
+    if world.start_pause:
+        screen.blit(current_frame,(player_x-camera_x+current_anchor[0], player_y-camera_y+current_anchor[1]))
+        draw_lights(camera_x, camera_y, player_x, player_y, (), alpha)
+        msg = render_text_gradient("Press DOWN ARROW to transform into your soul", small_font,(0,180,255),(180,255,255))
+        screen.blit(msg,(WIDTH//2-msg.get_width()//2, HEIGHT//2-50))
+        return
+
+    if world.first_soul_done and world.thought_active:
+        thought_msg = render_text_gradient(
+            "I need mana to do that again",
+            small_font,
+            (0, 180, 255),
+            (180, 255, 255)
+        )
+        screen.blit(thought_msg, (WIDTH // 2 - thought_msg.get_width() // 2, HEIGHT // 2 - 100))
+
+    view = view_rect(camera_x, camera_y)
+    mana_centers = []
+    for pickup in world.visible_pickups(view):
+        mana_rect = pickup.rect
+        if not view.colliderect(mana_rect):
+            continue
         render_mana([mana_rect.centerx-camera_x,mana_rect.centery-camera_y])
+        mana_centers.append(mana_rect.center)
+    profiler.lap("draw_mana")
     pulse = 0.6 + 0.4 * math.sin(pygame.time.get_ticks() * 0.005)
 
-    for proj in projectiles:
-        sx, sy = proj["pos"][0] - camera_x, proj["pos"][1] - camera_y
-
-        if proj.get("type") == "soul":
-            img = add_glow(soul_core, (100, 200, 255), glow_size=12, pulse=pulse)
-        else:
-            img = add_glow(projectile_core, (255, 100, 0), glow_size=12, pulse=pulse)
-
-        rect = img.get_rect(center=(sx, sy))
-        screen.blit(img, rect)
-    screen.blit(current_frame,(player_x-camera_x-current_frame.get_width()//2,
-                               player_y-camera_y-current_frame.get_height()//2))
+    profiler.count("blits", glow_cache.draw(screen, world.projectiles, pulse, camera_x, camera_y, alpha))
+    profiler.count("projectiles", len(world.projectiles))
+    profiler.lap("draw_projectiles")
+    screen.blit(current_frame,(player_x-camera_x+current_anchor[0], player_y-camera_y+current_anchor[1]))
+    draw_lights(camera_x, camera_y, player_x, player_y, mana_centers, alpha)
     # HUD
-    mana_text = render_text_gradient(f"Mana: {mana}", font,(0,180,255),(180,255,255))
+    mana_text = mana_label.update(world.player.mana)
     screen.blit(mana_text,(20,20))
 
     # --- TIP AFTER FIRST SOUL ---
-    if event_after_first_soul and time.time()-tip_start_time<3.0:
+    if world.event_after_first_soul and world.time-world.tip_start_time<TIP_DURATION:
         tip_msg = render_text_gradient("You are now a soul! Move freely with WASD.",small_font,(0,180,255),(180,255,255))
         screen.blit(tip_msg,(WIDTH//2-tip_msg.get_width()//2,100))
+    profiler.lap("draw_player_hud")
+
+
+fade_surface = pygame.Surface((WIDTH, HEIGHT))  # black, alpha set per frame
 
-    pygame.display.flip()
-    game_time+=1
+def draw_fade():
+    # covers the door transition; the next level is swapped in while the screen is black
+    if world.fade_alpha > 0:
+        fade_surface.set_alpha(int(world.fade_alpha))
+        screen.blit(fade_surface, (0, 0))
 
-pygame.quit()
+
+# --- GAME LOOP ---
+game_time=0
+profiler = FrameProfiler()
+
+def seed_arg(text):
+    seed = int(text)
+    if seed not in SEED_RANGE:
+        raise argparse.ArgumentTypeError(f"seed must be a signed 64-bit integer, got {seed}")
+    return seed
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Last Soul")
+    parser.add_argument("--seed", type=seed_arg, help="seed for projectile spawns (random by default)")
+    parser.add_argument("--record", metavar="FILE", help="record every tick's input to FILE for replay.py")
+    parser.add_argument("--profile", action="store_true", help="time every stage of the loop (F3 shows the overlay)")
+    parser.add_argument("--profile-out", metavar="FILE", help="write per-frame timings to FILE (.csv or .json)")
+    parser.add_argument("--renderer", choices=RENDERERS, default="surface",
+                        help="surface: software blits (default); texture: SDL2 Renderer/Texture")
+    parser.add_argument("--render-driver", metavar="NAME",
+                        help="SDL render driver for --renderer texture, e.g. software or opengl")
+    parser.add_argument("--startup-benchmark", metavar="FILE", nargs="?", const="",
+                        help="start the game straight from the menu, quit after the first gameplay frame and "
+                             "print how long both took (appended to FILE as JSON lines if given)")
+    return parser.parse_args()
+
+def report_startup(first_menu, first_gameplay, path):
+    print(f"startup: first menu frame {first_menu * 1000:.0f} ms, first gameplay frame {first_gameplay * 1000:.0f} ms")
+    if path:
+        with open(path, "a") as f:
+            f.write(json.dumps({"date": time.strftime("%Y-%m-%d %H:%M:%S"),
+                                "first_menu_ms": round(first_menu * 1000, 1),
+                                "first_gameplay_ms": round(first_gameplay * 1000, 1)}) + "\n")
+
+def frame_rate(idle):
+    """Full FPS while playing or fading; static screens run slower, and slower still when idle."""
+    if start_menu:
+        settled = True
+    elif world is None:
+        settled = False
+    else:
+        settled = (world.game_over and world.game_over_alpha >= 255) or (world.you_won and world.you_won_alpha >= 255)
+    if not settled:
+        return FPS
+    return UI_IDLE_FPS if idle >= UI_IDLE_TIME else UI_FPS
+
+def start_game(levels, seed):
+    """Builds the World when the menu is left, after the background loading has finished."""
+    global world, current_frame
+    soul_frames = assets.animation("player_soul").frames
+    world = World(
+        level_loader=levels.get,
+        transform_frames=len(soul_frames),
+        soul_hitbox=(soul_frames[0].get_width()//2, soul_frames[0].get_height()//2) if soul_frames else None,
+        seed=seed,
+    )
+    current_frame = initial_player_frame()
+
+def open_display(renderer, driver=None):
+    global display, screen, ui_screen, world_layer
+    display = create_display(renderer, (WIDTH, HEIGHT), driver)
+    screen = display.screen
+    ui_screen = DirtyScreen(screen, display.present, enabled=UI_DIRTY_RECTS)
+    if display.name == "texture":
+        # the exact wave path redraws its surfaces in place, which uploaded textures would miss
+        wave_border.cached = True
+    elif NATIVE_WORLD:
+        world_layer = NativeLayer((WIDTH, HEIGHT), ZOOM)
+
+def main():
+    global world, start_menu, game_time, profiler, debug_font
+    args = parse_args()
+    open_display(args.renderer, args.render_driver)
+    profiler = FrameProfiler(enabled=args.profile, export_path=args.profile_out)
+    benchmark = args.startup_benchmark is not None
+    first_menu = first_gameplay = None
+    # levels load on a worker thread one door ahead, and the last few stay in memory;
+    # level 1 and the other assets load while the menu is up
+    levels = LevelStreamer(load_lit_level)
+    levels.preload(1)
+    loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="asset-loader")
+    loading = loader.submit(load_in_background)
+    world = None
+    recorder = None
+    tick = 1.0 / TICK_RATE
+    accumulator = 0.0
+    last_input = time.perf_counter()
+    running=True
+
+    while running:
+        dt = clock.tick(frame_rate(time.perf_counter() - last_input))/1000.0
+        profiler.begin_frame()
+        for event in pygame.event.get():
+            last_input = time.perf_counter()
+            if event.type==pygame.QUIT:
+                running=False
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                ui_screen.invalidate()  # the window contents may be gone; compose again
+            elif event.type==pygame.KEYDOWN and event.key==pygame.K_F3:
+                if debug_font is None:
+                    debug_font = pygame.font.SysFont("monospace", 14)
+                profiler.toggle_overlay()
+                if not profiler.enabled and world is not None:
+                    world.timings = None  # stop timing ticks nobody reads; re-enabled on the next toggle
+            elif event.type==pygame.KEYDOWN and event.key==pygame.K_F4:
+                lighting.enabled = not lighting.enabled
+
+        keys = pygame.key.get_pressed()
+        profiler.lap("input")
+
+        # --- START MENU ---
+        if start_menu:
+            draw_start_menu()
+            ui_screen.update()
+            if first_menu is None:
+                first_menu = time.perf_counter() - START_TIME
+
+            if keys[pygame.K_RETURN] or benchmark:
+                start_menu = False  # start the game, beginning with the first pause/intro
+            if keys[pygame.K_ESCAPE]:
+                running = False
+            music.update()
+            game_time += dt * TICK_RATE
+            continue
+
+        if world is None:
+            loading.result()  # usually long done; re-raises anything that failed in the background
+            start_game(levels, args.seed)
+            recorder = InputRecorder(args.record, world) if args.record else None
+            accumulator = 0.0
+
+        if (world.game_over or world.you_won) and keys[pygame.K_ESCAPE]:
+            running=False
+
+        # --- SIMULATION ---
+        # fixed ticks keep physics identical at any frame rate
+        inputs = inputs_from_keys(keys)
+        if profiler.enabled and world.timings is None:
+            world.enable_timings()
+        accumulator = min(accumulator + dt, MAX_FRAME_TIME)
+        while accumulator >= tick:
+            world.step(inputs, tick)
+            if recorder: recorder.record(inputs)
+            accumulator -= tick
+            if not (world.game_over or world.you_won or world.start_pause):
+                update_player_frame()
+            if not world.game_over:
+                game_time += 1
+        profiler.lap("simulation")
+        if profiler.enabled:
+            # the world times its own sections; report them as parts of "simulation"
+            for section, seconds in world.timings.items():
+                profiler.add("sim." + section, seconds * 1000.0)
+                world.timings[section] = 0.0
+        play_events()
+        music.update()
+        profiler.lap("audio")
+
+        # --- DRAW ---
+        if world.game_over:
+            draw_game_over()
+        elif world.you_won:
+            draw_you_won()
+        else:
+            draw_world(accumulator / tick)
+            draw_fade()
+            ui_screen.invalidate()
+        overlay_rect = profiler.draw_overlay(screen, debug_font)
+        profiler.lap("overlay")
+        if world.game_over or world.you_won:
+            ui_screen.add(overlay_rect)
+            profiler.count("dirty_rects", ui_screen.update())
+        else:
+            display.present()
+        profiler.lap("flip")
+        profiler.end_frame()
+        if first_gameplay is None:
+            first_gameplay = time.perf_counter() - START_TIME
+            if benchmark:
+                report_startup(first_menu, first_gameplay, args.startup_benchmark)
+                running = False
+
+    levels.shutdown()
+    loader.shutdown()
+    if recorder:
+        recorder.save(world)
+    profiler.dump()
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+import json
+import os
+import re
+import time
+
+import pygame
+
+from settings import PLAYER_RADIUS
+
+
+# --- FILES ---
+ANIMATION_DIR = "assets/images/animations"
+# how each animation is scaled: to a fixed size, or by a factor of its own size
+ANIMATIONS = {
+    "player_idle": {"size": (PLAYER_RADIUS * 2, PLAYER_RADIUS * 2)},
+    "player_run": {"size": (PLAYER_RADIUS * 2, PLAYER_RADIUS * 2)},
+    "player_jump": {"size": (PLAYER_RADIUS * 2, PLAYER_RADIUS * 2)},
+    "player_soul": {"scale": 4},
+}
+SOUND_FILES = {
+    "mana_1": "assets/sfx/mana_1.wav",
+    "mana_2": "assets/sfx/mana_2.wav",
+    "death": "assets/sfx/death.wav",
+    "enter_soul": "assets/sfx/enter_soul.wav",
+    "exit_soul": "assets/sfx/exit_soul.wav",
+}
+CONFIG_FPS = 60        # config.json frame durations are counted in frames of a 60 fps editor
+DEFAULT_DURATION = 4   # config frames per image when an animation has no config.json
+ATLAS_WIDTH = 512
+
+
+def natural_key(name):
+    # img_2 before img_10
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+
+def frame_files(folder):
+    """The .png files of an animation folder in frame order."""
+    if not os.path.isdir(folder):
+        return []
+    names = sorted((name for name in os.listdir(folder) if name.endswith(".png")), key=natural_key)
+    return [os.path.join(folder, name) for name in names]
+
+
+def pack_atlas(sizes, max_width=ATLAS_WIDTH):
+    """Shelf packing, tallest first. Returns a rect per size and the atlas size."""
+    rects = [None] * len(sizes)
+    x = y = shelf_h = width = 0
+    for i in sorted(range(len(sizes)), key=lambda i: -sizes[i][1]):
+        w, h = sizes[i]
+        if x and x + w > max_width:
+            x, y, shelf_h = 0, y + shelf_h, 0
+        rects[i] = (x, y, w, h)
+        x += w
+        shelf_h = max(shelf_h, h)
+        width = max(width, x)
+    return rects, (max(1, width), max(1, y + shelf_h))
+
+
+def surface_bytes(surface):
+    return surface.get_pitch() * surface.get_height()
+
+
+# --- ANIMATION ---
+class Animation:
+    """Frames of one animation plus the timing from its config.json (durations in seconds).
+
+    mirrored holds the same frames flipped horizontally, made once at load; placeholder is
+    what frame_at returns when the animation has no frames.
+    """
+
+    def __init__(self, frames, durations, loop=True, offset=(0, 0), mirrored=None, placeholder=None):
+        self.frames = frames
+        self.mirrored = mirrored if mirrored is not None else frames
+        self.placeholder = placeholder
+        self.durations = durations
+        self.loop = loop
+        self.offset = offset  # config.json offset of the sprite from the hitbox's top-left, in screen pixels
+        self.length = sum(durations)
+
+    def index_at(self, elapsed):
+        if len(self.frames) < 2 or self.length <= 0:
+            return 0
+        if elapsed >= self.length:
+            if not self.loop:
+                return len(self.frames) - 1
+            elapsed %= self.length
+        for index, duration in enumerate(self.durations):
+            if elapsed < duration:
+                return index
+            elapsed -= duration
+        return len(self.frames) - 1
+
+    def frame_at(self, elapsed, flipped=False):
+        frames = self.mirrored if flipped else self.frames
+        if not frames:
+            return self.placeholder
+        return frames[self.index_at(elapsed)]
+
+
+class AnimationPlayer:
+    """Which animation a sprite is playing and how far into it, by elapsed game time."""
+
+    def __init__(self, assets):
+        self.assets = assets
+        self.name = None
+        self.elapsed = 0.0
+
+    def update(self, name, dt, flipped=False):
+        """Advances by dt seconds (restarting when name changes) and returns the frame to draw."""
+        if name != self.name:
+            self.name, self.elapsed = name, 0.0
+        else:
+            self.elapsed += dt
+        return self.assets.animation(name).frame_at(self.elapsed, flipped)
+
+
+def read_config(folder, count):
+    """Durations (seconds), loop and offset (source pixels) from folder/config.json, padded to count frames."""
+    path = os.path.join(folder, "config.json")
+    config = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            config = json.load(f)
+    frames = list(config.get("frames") or [])[:count]
+    frames += [frames[-1] if frames else DEFAULT_DURATION] * (count - len(frames))
+    speed = config.get("speed") or 1.0
+    durations = [duration / CONFIG_FPS / speed for duration in frames]
+    return durations, bool(config.get("loop", True)), tuple(config.get("offset") or (0, 0))
+
+
+# --- ASSET MANAGER ---
+class AssetManager:
+    """Loads animations and sounds the first time they are asked for.
+
+    The frames of an animation are scaled once and packed into one atlas surface; every frame
+    is a subsurface of it. stats keeps the load time and memory of each asset.
+    """
+
+    def __init__(self, sound_files=SOUND_FILES, animation_dir=ANIMATION_DIR):
+        self.sound_files = sound_files
+        self.animation_dir = animation_dir
+        self.cache = {}
+        self.stats = {}  # name -> [kind, load ms, bytes, surfaces]
+
+    def _record(self, name, kind, start, size, surfaces=0):
+        self.stats[name] = [kind, (time.perf_counter() - start) * 1000.0, size, surfaces]
+
+    def animation(self, name, size=None, scale=None):
+        """Frames of animations/<name>, scaled as ANIMATIONS says unless size or scale is given.
+
+        Missing folders give an animation without frames, drawn as the shared placeholder.
+        """
+        spec = ANIMATIONS.get(name, {})
+        if size is None and scale is None:
+            size, scale = spec.get("size"), spec.get("scale")
+        scale = scale or 1
+        key = ("animation", name, size, scale)
+        if key in self.cache:
+            return self.cache[key]
+        start = time.perf_counter()
+        folder = os.path.join(self.animation_dir, name)
+        images = [pygame.image.load(path) for path in frame_files(folder)]
+        native = images[0].get_size() if images else (1, 1)
+        images = [pygame.transform.scale(image, size or (image.get_width() * scale, image.get_height() * scale))
+                  for image in images]
+
+        rects, atlas_size = pack_atlas([image.get_size() for image in images])
+        atlas = pygame.Surface(atlas_size, pygame.SRCALPHA)
+        for image, rect in zip(images, rects):
+            # added onto a cleared atlas, so alpha is copied rather than blended
+            atlas.blit(image, rect[:2], special_flags=pygame.BLEND_RGBA_ADD)
+        if pygame.display.get_surface():
+            atlas = atlas.convert_alpha()
+        frames = [atlas.subsurface(rect) for rect in rects]
+        # flipping the whole atlas mirrors every frame in place, at the mirrored x
+        mirrored_atlas = pygame.transform.flip(atlas, True, False)
+        mirrored = [mirrored_atlas.subsurface((atlas_size[0] - x - w, y, w, h)) for x, y, w, h in rects]
+
+        durations, loop, offset = read_config(folder, len(frames))
+        if frames:
+            offset = (offset[0] * frames[0].get_width() // native[0], offset[1] * frames[0].get_height() // native[1])
+        placeholder = None if frames else self.placeholder(size or (PLAYER_RADIUS * 2, PLAYER_RADIUS * 2))
+        animation = self.cache[key] = Animation(frames, durations, loop, offset, mirrored, placeholder)
+        self._record(name, "animation", start, surface_bytes(atlas) * 2 if frames else 0, len(frames))
+        return animation
+
+    def placeholder(self, size):
+        """A grey circle of size, made once per size and shared, for sprites whose frames are missing."""
+        key = ("placeholder", tuple(size))
+        image = self.cache.get(key)
+        if image is None:
+            image = self.cache[key] = pygame.Surface(size, pygame.SRCALPHA)
+            pygame.draw.circle(image, (200, 200, 200), (size[0] // 2, size[1] // 2), size[0] // 2)
+        return image
+
+    def sound(self, name):
+        """The Sound for name, or None when the file is missing or the mixer is unavailable."""
+        key = ("sound", name)
+        if key in self.cache:
+            return self.cache[key]
+        path = self.sound_files.get(name)
+        if path is None:
+            return None
+        start = time.perf_counter()
+        sound = None
+        if os.path.exists(path) and pygame.mixer.get_init():
+            try:
+                sound = pygame.mixer.Sound(path)
+            except pygame.error:
+                sound = None
+        self.cache[key] = sound
+        self._record(name, "sound", start, len(sound.get_raw()) if sound else 0)
+        return sound
+
+    def report(self):
+        lines = [f"{'asset':<14}{'kind':<11}{'ms':>8}{'KB':>9}{'frames':>8}"]
+        for name, (kind, ms, size, surfaces) in sorted(self.stats.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<14}{kind:<11}{ms:8.2f}{size / 1024:9.1f}{surfaces:8}")
+        total_ms = sum(stat[1] for stat in self.stats.values())
+        total_size = sum(stat[2] for stat in self.stats.values())
+        lines.append(f"{'total':<25}{total_ms:8.2f}{total_size / 1024:9.1f}")
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # python assets.py -- load everything once and print per-asset load time and memory
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    assets = AssetManager()
+    for name in ANIMATIONS:
+        assets.animation(name)
+    for name in SOUND_FILES:
+        assets.sound(name)
+    print(assets.report())
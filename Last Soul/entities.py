@@ -0,0 +1,48 @@
+import pygame
+
+
+# --- ENTITIES ---
+# plain __slots__ records: no per-instance dict, fast attribute access in the tick loop.
+# Projectiles live in ProjectilePool's arrays instead.
+class Player:
+    __slots__ = ("x", "y", "prev_x", "prev_y", "vel_y", "on_ground", "is_soul", "mana", "soul_timer",
+                 "transforming", "transform_frame", "dx", "dy", "rect")
+
+    def __init__(self, x, y, mana=1):
+        self.x, self.y = x, y
+        self.prev_x, self.prev_y = x, y
+        self.vel_y = 0
+        self.on_ground = False
+        self.is_soul = False
+        self.mana = mana
+        self.soul_timer = 0
+        self.transforming = False
+        self.transform_frame = 0
+        self.dx = self.dy = 0
+        self.rect = pygame.Rect(0, 0, 0, 0)
+
+    def snapshot(self):
+        return tuple(getattr(self, name) for name in self.__slots__[:-1]) + (self.rect.copy(),)
+
+    def restore(self, snapshot):
+        for name, value in zip(self.__slots__, snapshot):
+            setattr(self, name, value)
+        self.rect = self.rect.copy()
+
+
+class Pickup:
+    """A mana orb. id is its Tiled object id, which keys it in the World's collected bitsets."""
+    __slots__ = ("id", "rect", "value")
+
+    def __init__(self, obj_id, rect, value=1):
+        self.id = obj_id
+        self.rect = rect
+        self.value = value
+
+
+class Door:
+    __slots__ = ("rect", "target")
+
+    def __init__(self, rect, target):
+        self.rect = rect
+        self.target = target  # level number it leads to
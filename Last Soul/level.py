@@ -0,0 +1,374 @@
+import math
+
+import pygame
+import pytmx
+
+from entities import Pickup
+from settings import AUTHORED_COLLISIONS
+
+
+# --- RENDER CACHE ---
+CHUNK_TILES = 16  # chunk size in tiles (16x16 tiles per baked surface)
+
+
+class ScaledImages:
+    """Tile images scaled by zoom, built once per gid (tiles) or per (gid, size) (objects)."""
+
+    def __init__(self, tmx_data, zoom):
+        self.tmx_data = tmx_data
+        self.zoom = zoom
+        self.tile_w = tmx_data.tilewidth * zoom
+        self.tile_h = tmx_data.tileheight * zoom
+        self.tiles = {}
+        self.objects = {}
+
+    def tile(self, gid):
+        if gid in self.tiles:
+            return self.tiles[gid]
+        image = self.tmx_data.get_tile_image_by_gid(gid) if gid else None
+        if image:
+            image = pygame.transform.scale(image, (self.tile_w, self.tile_h))
+        self.tiles[gid] = image
+        return image
+
+    def object(self, gid, width, height):
+        size = (int(width * self.zoom), int(height * self.zoom))
+        key = (gid, size)
+        if key in self.objects:
+            return self.objects[key]
+        image = self.tmx_data.get_tile_image_by_gid(gid)
+        if image:
+            image = pygame.transform.scale(image, size)
+        self.objects[key] = image
+        return image
+
+
+def draw_ops(tmx_data, images, skip_groups=("mana",)):
+    """Yields (image, world_x, world_y) for every tile and tile object, in layer order."""
+    for layer in tmx_data.visible_layers:
+        if isinstance(layer, pytmx.TiledTileLayer):
+            for x, y, gid in layer:
+                image = images.tile(gid)
+                if image:
+                    yield image, x * images.tile_w, y * images.tile_h
+        elif isinstance(layer, pytmx.TiledObjectGroup):
+            if getattr(layer, "name", "") in skip_groups:
+                continue
+            for obj in layer:
+                if hasattr(obj, "gid") and obj.gid:
+                    image = images.object(obj.gid, obj.width, obj.height)
+                    if image:
+                        yield image, obj.x * images.zoom, obj.y * images.zoom
+
+
+def shrink(surface, factor):
+    """Nearest-neighbour downscale that keeps the middle pixel of each factor x factor block.
+
+    Undoes a zoom exactly on the tile grid; images baked off the grid land within a zoomed pixel,
+    where sampling the block's corner (as transform.scale does) could miss them by a whole one.
+    """
+    w, h = surface.get_width() // factor, surface.get_height() // factor
+    small = pygame.Surface((w, h), pygame.SRCALPHA)
+    middle = factor // 2
+    pygame.surfarray.pixels3d(small)[:] = pygame.surfarray.pixels3d(surface)[middle::factor, middle::factor][:w, :h]
+    pygame.surfarray.pixels_alpha(small)[:] = pygame.surfarray.pixels_alpha(surface)[middle::factor, middle::factor][:w, :h]
+    return small
+
+
+class LevelRenderCache:
+    """Static layers baked into chunk surfaces; fill with bake() then call finish()."""
+
+    def __init__(self, width, height, tile_w, tile_h, chunk_tiles=CHUNK_TILES):
+        # width and height are in tiles, tile_w and tile_h in (zoomed) pixels
+        self.tile_w = tile_w
+        self.tile_h = tile_h
+        self.chunk_w = tile_w * chunk_tiles
+        self.chunk_h = tile_h * chunk_tiles
+        self.cols = (width * tile_w + self.chunk_w - 1) // self.chunk_w
+        self.rows = (height * tile_h + self.chunk_h - 1) // self.chunk_h
+        self.chunks = {}
+
+    @classmethod
+    def from_tmx(cls, tmx_data, zoom, chunk_tiles=CHUNK_TILES, skip_groups=("mana",)):
+        images = ScaledImages(tmx_data, zoom)
+        cache = cls(tmx_data.width, tmx_data.height, images.tile_w, images.tile_h, chunk_tiles)
+        for image, world_x, world_y in draw_ops(tmx_data, images, skip_groups):
+            cache.bake(image, world_x, world_y)
+        cache.finish()
+        return cache
+
+    def finish(self):
+        # match the display format once so chunk blits take the fast path
+        if pygame.display.get_surface():
+            for key, chunk in self.chunks.items():
+                self.chunks[key] = chunk.convert_alpha()
+
+    def bake(self, image, world_x, world_y):
+        # an image can straddle chunk borders, so it is drawn into every chunk it touches
+        w, h = image.get_size()
+        world_x, world_y = int(world_x), int(world_y)
+        first_col = max(0, world_x // self.chunk_w)
+        last_col = min(self.cols - 1, (world_x + w - 1) // self.chunk_w)
+        first_row = max(0, world_y // self.chunk_h)
+        last_row = min(self.rows - 1, (world_y + h - 1) // self.chunk_h)
+        for cy in range(first_row, last_row + 1):
+            for cx in range(first_col, last_col + 1):
+                chunk = self.chunks.get((cx, cy))
+                if chunk is None:
+                    chunk = pygame.Surface((self.chunk_w, self.chunk_h), pygame.SRCALPHA)
+                    self.chunks[(cx, cy)] = chunk
+                chunk.blit(image, (world_x - cx * self.chunk_w, world_y - cy * self.chunk_h))
+
+    def scaled_down(self, factor):
+        """A copy with every chunk shrunk by factor, i.e. at the map's native pixel size for factor=zoom."""
+        cache = LevelRenderCache.__new__(LevelRenderCache)
+        cache.tile_w, cache.tile_h = self.tile_w // factor, self.tile_h // factor
+        cache.chunk_w, cache.chunk_h = self.chunk_w // factor, self.chunk_h // factor
+        cache.cols, cache.rows = self.cols, self.rows
+        cache.chunks = {key: shrink(chunk, factor) for key, chunk in self.chunks.items()}
+        cache.finish()
+        return cache
+
+    def draw(self, surface, camera_x, camera_y):
+        view_w, view_h = surface.get_size()
+        first_col = max(0, int(camera_x) // self.chunk_w)
+        last_col = min(self.cols - 1, int(camera_x + view_w) // self.chunk_w)
+        first_row = max(0, int(camera_y) // self.chunk_h)
+        last_row = min(self.rows - 1, int(camera_y + view_h) // self.chunk_h)
+        blits = 0
+        for cy in range(first_row, last_row + 1):
+            for cx in range(first_col, last_col + 1):
+                chunk = self.chunks.get((cx, cy))
+                if chunk:
+                    surface.blit(chunk, (cx * self.chunk_w - camera_x, cy * self.chunk_h - camera_y))
+                    blits += 1
+        return blits
+
+
+# --- COLLISION GRID ---
+def solid_flags(tmx_data):
+    """One byte per tile (row-major), 1 where any visible layer has a tile with the "collide" property."""
+    flags = bytearray(tmx_data.width * tmx_data.height)
+    solid_gids = {}
+    for layer in tmx_data.visible_layers:
+        if isinstance(layer, pytmx.TiledTileLayer):
+            for x, y, gid in layer:
+                if not gid:
+                    continue
+                if gid not in solid_gids:
+                    props = tmx_data.get_tile_properties_by_gid(gid) or {}
+                    solid_gids[gid] = bool(props.get("collide"))
+                if solid_gids[gid] and 0 <= x < tmx_data.width and 0 <= y < tmx_data.height:
+                    flags[y * tmx_data.width + x] = 1
+    return flags
+
+
+def merge_tiles(flags, width, height):
+    """Greedy meshing: covers the solid tiles with few large rects, as (tx, ty, tw, th) in tiles.
+
+    Each rect grows right as far as its row is solid, then down while the whole span below is.
+    """
+    free = bytearray(flags)  # solid and not covered yet
+    rects = []
+    for ty in range(height):
+        row = ty * width
+        tx = 0
+        while tx < width:
+            if not free[row + tx]:
+                tx += 1
+                continue
+            end = tx
+            while end < width and free[row + end]:
+                end += 1
+            th = 1
+            while ty + th < height and all(free[(ty + th) * width + tx:(ty + th) * width + end]):
+                th += 1
+            for y in range(ty, ty + th):
+                free[y * width + tx:y * width + end] = bytes(end - tx)
+            rects.append((tx, ty, end - tx, th))
+            tx = end
+    return rects
+
+
+COLLISION_GROUP = "collisions"
+
+
+def collision_objects(tmx_data, zoom):
+    """Rects of the objects in the map's "collisions" group, scaled by zoom."""
+    for layer in tmx_data.visible_layers:
+        if isinstance(layer, pytmx.TiledObjectGroup) and getattr(layer, "name", "") == COLLISION_GROUP:
+            for obj in layer:
+                yield pygame.Rect(obj.x * zoom, obj.y * zoom, obj.width * zoom, obj.height * zoom)
+
+
+class CollisionGrid:
+    """Level colliders indexed by the tiles they cover, built once per level.
+
+    colliders defaults to the solid tiles merged into large rects (merge_tiles), which push the
+    player out exactly like the single tiles would with far fewer colliderect tests.
+    """
+
+    def __init__(self, width, height, tile_w, tile_h, flags, colliders=None):
+        self.tile_w = tile_w
+        self.tile_h = tile_h
+        self.width = width
+        self.height = height
+        self.flags = bytes(flags)
+        if colliders is None:
+            colliders = [pygame.Rect(tx * tile_w, ty * tile_h, tw * tile_w, th * tile_h)
+                         for tx, ty, tw, th in merge_tiles(self.flags, width, height)]
+        self.colliders = list(colliders)
+        # indices of the colliders reaching into each cell, None for empty cells (row-major)
+        self.cells = [None] * (width * height)
+        for index, rect in enumerate(self.colliders):
+            for ty in range(max(0, rect.top // tile_h), min(height, (rect.bottom - 1) // tile_h + 1)):
+                for tx in range(max(0, rect.left // tile_w), min(width, (rect.right - 1) // tile_w + 1)):
+                    cell = ty * width + tx
+                    self.cells[cell] = (self.cells[cell] or ()) + (index,)
+
+    @classmethod
+    def from_tmx(cls, tmx_data, zoom, authored=AUTHORED_COLLISIONS):
+        """authored adds the map's "collisions" objects to the merged solid tiles."""
+        width, height = tmx_data.width, tmx_data.height
+        tile_w, tile_h = tmx_data.tilewidth * zoom, tmx_data.tileheight * zoom
+        flags = solid_flags(tmx_data)
+        colliders = [pygame.Rect(tx * tile_w, ty * tile_h, tw * tile_w, th * tile_h)
+                     for tx, ty, tw, th in merge_tiles(flags, width, height)]
+        if authored:
+            colliders += collision_objects(tmx_data, zoom)
+        return cls(width, height, tile_w, tile_h, flags, colliders)
+
+    def query(self, rect):
+        """Returns the colliders reaching into the tiles under rect, each once, in row-major order of first tile."""
+        first_x = max(0, rect.left // self.tile_w)
+        last_x = min(self.width - 1, (rect.right - 1) // self.tile_w)
+        first_y = max(0, rect.top // self.tile_h)
+        last_y = min(self.height - 1, (rect.bottom - 1) // self.tile_h)
+        cells = self.cells
+        colliders = self.colliders
+        found = []
+        for ty in range(first_y, last_y + 1):
+            row = ty * self.width
+            for tx in range(first_x, last_x + 1):
+                indices = cells[row + tx]
+                if indices is not None:
+                    for index in indices:
+                        if index not in found:
+                            found.append(index)
+        return [colliders[index] for index in found]
+
+    def move(self, rect, delta, vertical):
+        """Moves rect by delta along one axis, stopping it against the first colliders in its way.
+
+        Swept: a move longer than a tile is split into tile-sized substeps, each tested against
+        the colliders it covers, and the first blocked substep ends the move. A step no longer than
+        a tile always ends overlapping any collider it reached, so pushing the rect back out onto
+        that collider's edge is its time of impact and nothing can be tunnelled through at any speed.
+        Returns True when a collider blocked the move.
+        """
+        if not delta:
+            return False
+        steps = max(1, math.ceil(abs(delta) / (self.tile_h if vertical else self.tile_w)))
+        origin = rect.y if vertical else rect.x
+        for step in range(1, steps + 1):
+            start = rect.copy()
+            if vertical:
+                rect.y = origin + delta * step / steps
+            else:
+                rect.x = origin + delta * step / steps
+            blocked = False
+            for tile in self.query(rect.union(start)):
+                if rect.colliderect(tile):
+                    blocked = True
+                    if vertical:
+                        if delta > 0: rect.bottom = tile.top
+                        else: rect.top = tile.bottom
+                    else:
+                        if delta > 0: rect.right = tile.left
+                        else: rect.left = tile.right
+            if blocked:
+                return True
+        return False
+
+
+# --- SPATIAL INDEX ---
+INDEX_CELL = 256  # px per index cell
+
+
+class SpatialIndex:
+    """Buckets rects into a coarse grid so a query only looks at the cells it overlaps."""
+
+    def __init__(self, rects, cell=INDEX_CELL):
+        self.cell = cell
+        self.cells = {}  # (cx, cy) -> indices into rects
+        for index, rect in enumerate(rects):
+            for key in self._keys(rect):
+                self.cells.setdefault(key, []).append(index)
+
+    def _keys(self, rect):
+        cell = self.cell
+        for cy in range(rect.top // cell, (rect.bottom - 1) // cell + 1):
+            for cx in range(rect.left // cell, (rect.right - 1) // cell + 1):
+                yield cx, cy
+
+    def query(self, rect):
+        """Indices of the rects sharing a cell with rect (a superset of the overlapping ones), in order."""
+        found = set()
+        for key in self._keys(rect):
+            found.update(self.cells.get(key, ()))
+        return sorted(found)
+
+
+# --- LEVEL DATA ---
+class Level:
+    """Everything the game needs from one map: collisions, spawn, mana, doors and (optionally) its render cache."""
+
+    def __init__(self, collision, render=None, spawn=None, mana=(), door_objects=(), lights=()):
+        self.tile_width = collision.tile_w
+        self.tile_height = collision.tile_h
+        self.collision = collision
+        self.render = render
+        self.spawn = spawn
+        # mana is (Tiled object id, rect) pairs; pickups are never changed by play, what was
+        # collected is tracked by the World, keyed by object id: pickup_bits gives each id its bit
+        # (in id order, so it does not depend on the order the objects are stored in)
+        self.pickups = [Pickup(obj_id, rect) for obj_id, rect in mana]
+        self.pickup_bits = {obj_id: bit for bit, obj_id in enumerate(sorted(p.id for p in self.pickups))}
+        self.pickup_index = SpatialIndex([pickup.rect for pickup in self.pickups])
+        self.door_objects = list(door_objects)
+        self.lights = list(lights)  # rects of the "lights" objects (the lamps)
+        self.lightmap = None        # baked from lights by the frontend (lighting.Lighting.bake)
+        self.native_render = None   # render at 1/zoom, made by the frontend (which then drops render)
+
+    @classmethod
+    def from_tmx(cls, tmx_data, zoom, render=True):
+        spawn, mana, door_objects, lights = None, [], [], []
+        for kind, obj_id, x, y, w, h in level_entities(tmx_data, zoom):
+            if kind == "spawn_point":
+                spawn = (x, y)
+            elif kind == "mana":
+                mana.append((obj_id, pygame.Rect(x, y, w, h)))
+            elif kind == "door":
+                door_objects.append(pygame.Rect(x, y, w, h))
+            else:
+                lights.append(pygame.Rect(x, y, w, h))
+        # tiles and static objects are scaled and baked into chunks once per level
+        return cls(CollisionGrid.from_tmx(tmx_data, zoom),
+                   LevelRenderCache.from_tmx(tmx_data, zoom) if render else None,
+                   spawn, mana, door_objects, lights)
+
+
+ENTITY_GROUPS = ("spawn_point", "mana", "door", "lights")
+
+
+def level_entities(tmx_data, zoom):
+    """Yields (group, object id, x, y, w, h) for the spawn, mana, door and light objects, scaled by zoom."""
+    for layer in tmx_data.visible_layers:
+        if not isinstance(layer, pytmx.TiledObjectGroup):
+            continue
+        name = getattr(layer, "name", "")
+        if name not in ENTITY_GROUPS:
+            continue
+        for obj in layer:
+            # object coordinates in Tiled are in pixels already
+            yield name, obj.id, obj.x * zoom, obj.y * zoom, obj.width * zoom, obj.height * zoom
@@ -0,0 +1,334 @@
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pygame
+import pytmx
+from pytmx.util_pygame import handle_transformation
+
+from assets import pack_atlas
+from level import (ENTITY_GROUPS, CollisionGrid, Level, LevelRenderCache, ScaledImages, collision_objects,
+                   level_entities, merge_tiles, solid_flags)
+from settings import ZOOM, MAX_LEVEL, AUTHORED_COLLISIONS
+
+
+# --- FILE FORMAT ---
+# header:   magic, version, zoom, sha1 of the sources, newest source mtime, map size in tiles,
+#           zoomed tile size, atlas size, section count
+# sections: a table of (name, offset, size), then the sections themselves, 8-byte aligned so
+#           numpy can view them straight out of the mapped file
+#   SRCS  source files (tmx, tsx, png) relative to the bundle, one per line
+#   GRID  uint16 gid per tile, one width*height plane per visible tile layer
+#   GMAP  int16 atlas image per gid, -1 for gids without an image
+#   OBJS  (atlas image, x, y) per drawable tile object, positions already zoomed
+#   LAYR  (kind, first, count) per visible layer in draw order: kind 0 is a GRID plane, 1 a slice of OBJS
+#   SOLD  uint8 collision flag per tile
+#   COLL  (x, y, w, h) in tiles of the solid tiles merged into rects (merge_tiles)
+#   CLOB  (x, y, w, h) zoomed rects of the "collisions" objects, used when AUTHORED_COLLISIONS is on
+#   ENTS  (group, Tiled object id, x, y, w, h) for the spawn_point / mana / door / lights objects
+#   ATLS  (x, y, w, h) of every pre-scaled image inside the atlas
+#   APIX  RGBA pixels of the atlas
+MAGIC = b"LSLV"
+VERSION = 3
+HEADER = struct.Struct("<4sHH20sdHHHHHHH")
+SECTION = struct.Struct("<4sII")
+OBJECT = np.dtype([("image", "<i2"), ("x", "<i4"), ("y", "<i4")])
+LAYER = np.dtype([("kind", "u1"), ("first", "<u4"), ("count", "<u4")])
+ENTITY = np.dtype([("group", "u1"), ("id", "<u4"), ("x", "<f8"), ("y", "<f8"), ("w", "<f8"), ("h", "<f8")])
+TILE_LAYER, OBJECT_LAYER = 0, 1
+BUILD_DIR = "build/levels"
+
+
+def tmx_path(level_num):
+    return f"assets/maps/level_{level_num}.tmx"
+
+
+def bundle_path(level_num):
+    return os.path.join(BUILD_DIR, f"level_{level_num}.lvl")
+
+
+# --- SOURCES ---
+def tmx_sources(path):
+    """The tmx file and the external tsx tilesets it references."""
+    folder = os.path.dirname(path)
+    sources = [path]
+    for tileset in ET.parse(path).getroot().iter("tileset"):
+        if tileset.get("source"):
+            sources.append(os.path.normpath(os.path.join(folder, tileset.get("source"))))
+    return sources
+
+
+def newest_mtime(paths):
+    return max(os.stat(path).st_mtime for path in paths)
+
+
+def source_digest(paths, zoom):
+    digest = hashlib.sha1(struct.pack("<HH", VERSION, zoom))
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.digest()
+
+
+# --- COMPILER ---
+class SurfaceLoader:
+    """pytmx image loader without the display-format conversion, so levels compile without a window.
+
+    Remembers every image file it opened; they are sources of the bundle too.
+    """
+
+    def __init__(self):
+        self.files = []
+
+    def __call__(self, filename, colorkey, **kwargs):
+        image = pygame.image.load(filename)
+        if colorkey:
+            image.set_colorkey(pygame.Color(f"#{colorkey}"))
+        self.files.append(filename)
+
+        def load(rect=None, flags=None):
+            tile = image.subsurface(rect) if rect else image
+            if flags:
+                tile = handle_transformation(tile, flags)
+            return tile.copy()
+
+        return load
+
+
+def compile_level(source, out_path, zoom=ZOOM, skip_groups=("mana",)):
+    """Turns one tmx map into a level bundle at out_path. Returns the bundle size in bytes."""
+    loader = SurfaceLoader()
+    tmx_data = pytmx.TiledMap(source, image_loader=loader)
+    images = ScaledImages(tmx_data, zoom)
+    out_dir = os.path.dirname(out_path) or "."
+    sources = [os.path.normpath(path) for path in tmx_sources(source) + loader.files]
+    sources = sorted(set(sources), key=sources.index)
+
+    # every distinct scaled image goes into the atlas once
+    atlas_images = []
+    atlas_index = {}
+
+    def index_of(image):
+        if id(image) not in atlas_index:
+            atlas_index[id(image)] = len(atlas_images)
+            atlas_images.append(image)
+        return atlas_index[id(image)]
+
+    gid_map = np.full(len(tmx_data.images) or 1, -1, dtype="<i2")
+    planes, layers, objects = [], [], []
+    for layer in tmx_data.visible_layers:
+        if isinstance(layer, pytmx.TiledTileLayer):
+            plane = np.array(layer.data, dtype="<u2").reshape(tmx_data.height, tmx_data.width)
+            for gid in np.unique(plane).tolist():
+                image = images.tile(gid)
+                if image:
+                    gid_map[gid] = index_of(image)
+            layers.append((TILE_LAYER, len(planes), 1))
+            planes.append(plane)
+        elif isinstance(layer, pytmx.TiledObjectGroup):
+            if getattr(layer, "name", "") in skip_groups:
+                continue
+            first = len(objects)
+            for obj in layer:
+                if hasattr(obj, "gid") and obj.gid:
+                    image = images.object(obj.gid, obj.width, obj.height)
+                    if image:
+                        objects.append((index_of(image), int(obj.x * zoom), int(obj.y * zoom)))
+            layers.append((OBJECT_LAYER, first, len(objects) - first))
+
+    rects, atlas_size = pack_atlas([image.get_size() for image in atlas_images])
+    atlas = pygame.Surface(atlas_size, pygame.SRCALPHA)
+    for image, rect in zip(atlas_images, rects):
+        atlas.blit(image, rect[:2])
+
+    entities = [(ENTITY_GROUPS.index(group), obj_id, x, y, w, h)
+                for group, obj_id, x, y, w, h in level_entities(tmx_data, zoom)]
+    grid = np.array(planes, dtype="<u2") if planes else np.zeros(0, dtype="<u2")
+    solid = solid_flags(tmx_data)
+    merged = merge_tiles(solid, tmx_data.width, tmx_data.height)
+    authored = [tuple(rect) for rect in collision_objects(tmx_data, zoom)]
+    sections = [
+        (b"SRCS", "\n".join(os.path.relpath(path, out_dir) for path in sources).encode()),
+        (b"GRID", grid.tobytes()),
+        (b"GMAP", gid_map.tobytes()),
+        (b"OBJS", np.array(objects, dtype=OBJECT).tobytes()),
+        (b"LAYR", np.array(layers, dtype=LAYER).tobytes()),
+        (b"SOLD", bytes(solid)),
+        (b"COLL", np.array(merged, dtype="<u2").tobytes()),
+        (b"CLOB", np.array(authored, dtype="<i4").tobytes()),
+        (b"ENTS", np.array(entities, dtype=ENTITY).tobytes()),
+        (b"ATLS", np.array(rects, dtype="<u2").tobytes()),
+        (b"APIX", pygame.image.tobytes(atlas, "RGBA")),
+    ]
+
+    header = HEADER.pack(MAGIC, VERSION, zoom, source_digest(sources, zoom), newest_mtime(sources),
+                         tmx_data.width, tmx_data.height, images.tile_w, images.tile_h,
+                         atlas_size[0], atlas_size[1], len(sections))
+    offset = HEADER.size + SECTION.size * len(sections)
+    table, body = [], []
+    for name, data in sections:
+        padding = -offset % 8
+        body.append(b"\0" * padding + data)
+        offset += padding
+        table.append(SECTION.pack(name, offset, len(data)))
+        offset += len(data)
+
+    # write next to the target and swap it in, so a crash never leaves half a bundle behind
+    os.makedirs(out_dir, exist_ok=True)
+    with open(out_path + ".tmp", "wb") as f:
+        f.write(header)
+        f.writelines(table)
+        f.writelines(body)
+    os.replace(out_path + ".tmp", out_path)
+    return offset
+
+
+# --- LOADER ---
+class CompiledLevel:
+    """A level bundle mapped into memory; sections are read as numpy views, without copying or parsing."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        fields = HEADER.unpack_from(self.map) if len(self.map) >= HEADER.size else (b"", 0)
+        if fields[0] != MAGIC or fields[1] != VERSION:
+            self.map.close()
+            raise ValueError(f"{path} is not a Last Soul level bundle (version {VERSION})")
+        (_, _, self.zoom, self.digest, self.mtime, self.width, self.height,
+         self.tile_w, self.tile_h, self.atlas_w, self.atlas_h, count) = fields
+        self.sections = {}
+        for i in range(count):
+            name, offset, size = SECTION.unpack_from(self.map, HEADER.size + i * SECTION.size)
+            self.sections[name.decode()] = (offset, size)
+
+    def close(self):
+        self.map.close()
+
+    def array(self, name, dtype):
+        offset, size = self.sections[name]
+        dtype = np.dtype(dtype)
+        return np.frombuffer(self.map, dtype=dtype, count=size // dtype.itemsize, offset=offset)
+
+    def sources(self):
+        offset, size = self.sections["SRCS"]
+        folder = os.path.dirname(self.path)
+        return [os.path.normpath(os.path.join(folder, line))
+                for line in self.map[offset:offset + size].decode().splitlines()]
+
+    def is_fresh(self):
+        """True when the sources are unchanged: same mtime, or same content hash after a touch or checkout."""
+        sources = self.sources()
+        try:
+            mtime = newest_mtime(sources)
+        except OSError:
+            return True  # sources not shipped, the bundle is all there is
+        if mtime == self.mtime:
+            return True
+        if source_digest(sources, self.zoom) != self.digest:
+            return False
+        # only the timestamps moved; store them so the next load skips the hash
+        with open(self.path, "r+b") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.zoom, self.digest, mtime, self.width, self.height,
+                                self.tile_w, self.tile_h, self.atlas_w, self.atlas_h, len(self.sections)))
+        self.mtime = mtime
+        return True
+
+    def level(self, render=True, authored=AUTHORED_COLLISIONS):
+        tile_w, tile_h = self.tile_w, self.tile_h
+        colliders = [pygame.Rect(tx * tile_w, ty * tile_h, tw * tile_w, th * tile_h)
+                     for tx, ty, tw, th in self.array("COLL", "<u2").reshape(-1, 4).tolist()]
+        if authored:
+            colliders += [pygame.Rect(rect) for rect in self.array("CLOB", "<i4").reshape(-1, 4).tolist()]
+        collision = CollisionGrid(self.width, self.height, tile_w, tile_h, self.array("SOLD", "u1"), colliders)
+        spawn, mana, door_objects, lights = None, [], [], []
+        for group, obj_id, x, y, w, h in self.array("ENTS", ENTITY).tolist():
+            if ENTITY_GROUPS[group] == "spawn_point":
+                spawn = (x, y)
+            elif ENTITY_GROUPS[group] == "mana":
+                mana.append((obj_id, pygame.Rect(x, y, w, h)))
+            elif ENTITY_GROUPS[group] == "door":
+                door_objects.append(pygame.Rect(x, y, w, h))
+            else:
+                lights.append(pygame.Rect(x, y, w, h))
+        return Level(collision, self.render_cache() if render else None, spawn, mana, door_objects, lights)
+
+    def render_cache(self):
+        # one copy out of the mapped RGBA pixels into the chunks' own pixel format keeps every bake blit on the fast path
+        pixels = pygame.image.frombuffer(self.array("APIX", "u1"), (self.atlas_w, self.atlas_h), "RGBA")
+        atlas = pygame.Surface(pixels.get_size(), pygame.SRCALPHA)
+        atlas.blit(pixels, (0, 0), special_flags=pygame.BLEND_RGBA_ADD)
+        del pixels
+        images = [atlas.subsurface(rect) for rect in self.array("ATLS", "<u2").reshape(-1, 4).tolist()]
+        gid_map = self.array("GMAP", "<i2")
+        grid = self.array("GRID", "<u2").reshape(-1, self.height, self.width)
+        objects = self.array("OBJS", OBJECT)
+
+        cache = LevelRenderCache(self.width, self.height, self.tile_w, self.tile_h)
+        for kind, first, count in self.array("LAYR", LAYER).tolist():
+            if kind == TILE_LAYER:
+                for y, row in enumerate(gid_map[grid[first]].tolist()):
+                    for x, index in enumerate(row):
+                        if index >= 0:
+                            cache.bake(images[index], x * self.tile_w, y * self.tile_h)
+            else:
+                for index, x, y in objects[first:first + count].tolist():
+                    cache.bake(images[index], x, y)
+        cache.finish()
+        return cache
+
+
+def open_bundle(path, zoom):
+    """The bundle at path if it exists, matches zoom and is newer than its sources; None otherwise."""
+    if not os.path.exists(path):
+        return None
+    try:
+        bundle = CompiledLevel(path)
+    except ValueError:
+        return None
+    if bundle.zoom != zoom or not bundle.is_fresh():
+        bundle.close()
+        return None
+    return bundle
+
+
+def load_compiled_level(level_num, zoom=ZOOM, render=True):
+    """Loads build/levels/level_N.lvl, (re)compiling it first when it is missing or out of date."""
+    path = bundle_path(level_num)
+    bundle = open_bundle(path, zoom)
+    if bundle is None:
+        compile_level(tmx_path(level_num), path, zoom)
+        bundle = CompiledLevel(path)
+    try:
+        return bundle.level(render)
+    finally:
+        bundle.close()
+
+
+def main(args):
+    # python level_compiler.py [level numbers] -- compile the maps ahead of time and compare load times
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    levels = [int(arg) for arg in args] or range(1, MAX_LEVEL + 1)
+    for level_num in levels:
+        start = time.perf_counter()
+        size = compile_level(tmx_path(level_num), bundle_path(level_num), ZOOM)
+        compiled = time.perf_counter() - start
+
+        start = time.perf_counter()
+        Level.from_tmx(pytmx.TiledMap(tmx_path(level_num), image_loader=SurfaceLoader()), ZOOM)
+        parsed = time.perf_counter() - start
+        start = time.perf_counter()
+        load_compiled_level(level_num, ZOOM)
+        loaded = time.perf_counter() - start
+        print(f"{bundle_path(level_num)}: {size / 1024:.1f} KB, compiled in {compiled * 1000:.0f} ms; "
+              f"load {loaded * 1000:.1f} ms vs {parsed * 1000:.1f} ms from tmx")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,110 @@
+import numpy as np
+import pygame
+
+from render import TextureScreen
+from settings import LIGHT_AMBIENT, LIGHT_SCALE
+
+
+# --- LIGHT SPRITES ---
+LAMP_COLOR = (255, 190, 120)
+LAMP_RADIUS = 2.5  # light radius per px of the lamp object's longest side
+
+
+def radial_light(radius, color):
+    """An RGB sprite of a light: color at the centre fading to black at radius (quadratic falloff)."""
+    radius = max(1, int(round(radius)))
+    y, x = np.ogrid[-radius:radius + 1, -radius:radius + 1]
+    falloff = np.clip(1.0 - np.sqrt(x * x + y * y) / radius, 0.0, 1.0) ** 2
+    pixels = (falloff[..., None] * np.array(color, dtype=np.float64)).astype(np.uint8)
+    return pygame.surfarray.make_surface(pixels.swapaxes(0, 1))
+
+
+class LightSprites:
+    """Pre-rendered radial lights at lightmap resolution, one per (radius, color), shared by all lights."""
+
+    def __init__(self, scale=LIGHT_SCALE):
+        self.scale = scale
+        self.sprites = {}
+
+    def get(self, radius, color):
+        key = (int(radius), tuple(color))
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = self.sprites[key] = radial_light(radius / self.scale, color)
+        return sprite
+
+
+# --- LIGHTMAP ---
+class Lighting:
+    """Darkens the world to an ambient colour and lights it back up, in one composite per frame.
+
+    bake(level) draws the level's static lamps once into a lightmap at 1/scale resolution. Each
+    frame begin() copies the visible part of that into a small buffer, add()/add_many() put the
+    dynamic lights on top with additive blits, and draw() scales the buffer up once and
+    multiplies it onto the screen. The big blits cost the same however many lights there are.
+    """
+
+    def __init__(self, size, scale=LIGHT_SCALE, ambient=LIGHT_AMBIENT, enabled=True):
+        self.scale = scale
+        self.ambient = ambient
+        self.enabled = enabled
+        self.sprites = LightSprites(scale)
+        # one lightmap pixel of slack on each side covers the camera's sub-pixel offset
+        self.small = pygame.Surface((size[0] // scale + 2, size[1] // scale + 2))
+        self.big = pygame.Surface((self.small.get_width() * scale, self.small.get_height() * scale))
+        self.batch = []
+        self.origin = (0, 0)    # lightmap cell at the buffer's top left
+        self.camera = (0, 0)
+
+    def bake(self, level):
+        """Static lightmap of the level's "lights" objects."""
+        scale = self.scale
+        width = level.collision.width * level.tile_width
+        height = level.collision.height * level.tile_height
+        lightmap = pygame.Surface((width // scale + 1, height // scale + 1))
+        lightmap.fill(self.ambient)
+        for rect in level.lights:
+            sprite = self.sprites.get(LAMP_RADIUS * max(rect.w, rect.h), LAMP_COLOR)
+            lightmap.blit(sprite, (rect.centerx // scale - sprite.get_width() // 2,
+                                   rect.centery // scale - sprite.get_height() // 2),
+                          special_flags=pygame.BLEND_RGB_ADD)
+        return lightmap
+
+    def begin(self, lightmap, camera_x, camera_y):
+        self.camera = (camera_x, camera_y)
+        self.origin = (camera_x // self.scale, camera_y // self.scale)
+        self.batch = []
+        self.small.fill(self.ambient)  # outside the level
+        if lightmap is not None:
+            self.small.blit(lightmap, (-self.origin[0], -self.origin[1]))
+
+    def add(self, x, y, radius, color):
+        sprite = self.sprites.get(radius, color)
+        half = sprite.get_width() // 2
+        self.batch.append((sprite, (x // self.scale - self.origin[0] - half, y // self.scale - self.origin[1] - half),
+                           None, pygame.BLEND_RGB_ADD))
+
+    def add_many(self, positions, radius, color):
+        """Adds a light at every (x, y) row of positions that reaches into the view."""
+        if not len(positions):
+            return
+        sprite = self.sprites.get(radius, color)
+        half = sprite.get_width() // 2
+        cells = positions // self.scale - self.origin - half
+        w, h = self.small.get_size()
+        visible = ((cells[:, 0] > -sprite.get_width()) & (cells[:, 0] < w) &
+                   (cells[:, 1] > -sprite.get_height()) & (cells[:, 1] < h))
+        self.batch += [(sprite, pos, None, pygame.BLEND_RGB_ADD) for pos in cells[visible].tolist()]
+
+    def draw(self, surface):
+        """Composites the lights onto surface; returns the number of lights drawn."""
+        self.small.blits(self.batch, doreturn=False)
+        x = self.origin[0] * self.scale - self.camera[0]
+        y = self.origin[1] * self.scale - self.camera[1]
+        if isinstance(surface, TextureScreen):
+            # the renderer scales and multiplies in one textured draw
+            surface.blit_dynamic(self.small, (x, y), self.scale, pygame.BLEND_RGB_MULT)
+        else:
+            pygame.transform.scale(self.small, self.big.get_size(), self.big)
+            surface.blit(self.big, (x, y), special_flags=pygame.BLEND_RGB_MULT)
+        return len(self.batch)
@@ -0,0 +1,62 @@
+import os
+
+import pygame
+
+from settings import MUSIC_FADE_MS
+
+
+# --- TRACKS ---
+MENU_TRACK = "assets/music_1.wav"
+LEVEL_TRACKS = {
+    1: "assets/music_1.wav",
+    2: "assets/music_2.wav",
+    3: "assets/music_2.wav",
+}
+
+
+# --- MUSIC ---
+class MusicPlayer:
+    """One streamed track at a time through pygame.mixer.music.
+
+    Switching tracks fades the current one out and the next one in; asking for the track that
+    is already playing does nothing, so retries never restart or stack the music.
+    Call update() once per frame to start a track that is waiting for a fade-out to finish.
+    """
+
+    def __init__(self, fade_ms=MUSIC_FADE_MS):
+        self.fade_ms = fade_ms
+        self.current = None  # track playing (or fading in)
+        self.pending = None  # track to start once the fade-out ends
+        self.switching = False
+
+    def play(self, path):
+        if path and not os.path.exists(path):
+            path = None
+        if not pygame.mixer.get_init():
+            return
+        if self.switching:
+            self.pending = path
+            return
+        if path == self.current:
+            return
+        if self.current and pygame.mixer.music.get_busy():
+            pygame.mixer.music.fadeout(self.fade_ms)
+            self.pending, self.switching = path, True
+        else:
+            self._start(path)
+
+    def play_level(self, level_num):
+        self.play(LEVEL_TRACKS.get(level_num))
+
+    def update(self):
+        if self.switching and not pygame.mixer.music.get_busy():
+            self.switching = False
+            self._start(self.pending)
+            self.pending = None
+
+    def _start(self, path):
+        self.current = path
+        if path:
+            # loaded as a stream: only a small buffer is decoded at a time
+            pygame.mixer.music.load(path)
+            pygame.mixer.music.play(loops=-1, fade_ms=self.fade_ms)
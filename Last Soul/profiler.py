@@ -0,0 +1,150 @@
+import csv
+import json
+import time
+from collections import deque
+
+import pygame
+
+
+# --- FRAME PROFILER ---
+class FrameProfiler:
+    """Section timers and counters for the main loop.
+
+    Call begin_frame(), then lap(name) after each stage and end_frame() at the
+    end. While disabled every call returns straight away.
+    """
+
+    def __init__(self, window=240, enabled=False, export_path=None):
+        self.window = window
+        self.enabled = enabled or export_path is not None
+        self.export_path = export_path
+        self.overlay = False
+        self.history = {}  # stage -> deque of recent durations in ms
+        self.rows = []     # every frame, kept only when exporting
+        self.frame = {}
+        self.counters = {}
+        self.counter_names = set()
+        self._last = 0.0
+        self._frame_start = 0.0
+        self._partial = False  # enabled mid-frame: that frame's timings are incomplete
+        self._overlay_surf = None
+        self._overlay_time = 0.0
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.frame = {}
+        self.counters = {}
+        self._frame_start = self._last = time.perf_counter()
+
+    def lap(self, stage):
+        """Charges the time since the previous lap (or begin_frame) to stage."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.frame[stage] = self.frame.get(stage, 0.0) + (now - self._last) * 1000.0
+        self._last = now
+
+    def add(self, stage, ms):
+        """Charges a duration measured elsewhere (e.g. the World's own timings) to stage."""
+        if self.enabled:
+            self.frame[stage] = self.frame.get(stage, 0.0) + ms
+
+    def count(self, name, value):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        if self._partial:
+            self._partial = False
+            return
+        self.frame["frame"] = (time.perf_counter() - self._frame_start) * 1000.0
+        for stage, ms in self.frame.items():
+            history = self.history.get(stage)
+            if history is None:
+                history = self.history[stage] = deque(maxlen=self.window)
+            history.append(ms)
+        self.counter_names.update(self.counters)
+        for name, value in self.counters.items():
+            history = self.history.get(name)
+            if history is None:
+                history = self.history[name] = deque(maxlen=self.window)
+            history.append(value)
+        if self.export_path:
+            row = dict(self.frame)
+            row.update(self.counters)
+            self.rows.append(row)
+
+    def percentiles(self, name, points=(50, 95, 99)):
+        values = sorted(self.history.get(name, ()))
+        if not values:
+            return [0.0] * len(points)
+        return [values[min(len(values) - 1, len(values) * p // 100)] for p in points]
+
+    def toggle_overlay(self):
+        self.overlay = not self.overlay
+        if self.overlay and not self.enabled:
+            # the frame under way began while disabled; time from now and drop it at end_frame
+            self.enabled = True
+            self._frame_start = self._last = time.perf_counter()
+            self._partial = True
+        elif self.export_path is None:
+            self.enabled = False
+
+    def draw_overlay(self, surface, font, refresh=0.25):
+        """Rolling p50/p95/p99 per stage plus counters; re-rendered a few times per second.
+
+        Returns the rect drawn, or None while the overlay is hidden.
+        """
+        if not self.overlay:
+            return None
+        now = time.perf_counter()
+        if self._overlay_surf is None or now - self._overlay_time > refresh:
+            self._overlay_time = now
+            rows = [("ms", "p50", "p95", "p99")]
+            counters = []
+            for name in self.history:
+                p50, p95, p99 = self.percentiles(name)
+                if name in self.counter_names:
+                    counters.append((name, f"{p50:.0f}", f"{p95:.0f}", f"{p99:.0f}"))
+                else:
+                    rows.append((name, f"{p50:.2f}", f"{p95:.2f}", f"{p99:.2f}"))
+            rows += counters
+            self._overlay_surf = self._render_table(rows, font)
+        return surface.blit(self._overlay_surf, (surface.get_width() - self._overlay_surf.get_width() - 10, 10))
+
+    def _render_table(self, rows, font, color=(220, 255, 220)):
+        # cells are rendered one by one so columns line up with any font
+        cells = [[font.render(text, True, color) for text in row] for row in rows]
+        widths = [max(row[i].get_width() for row in cells) + 12 for i in range(len(rows[0]))]
+        line_h = font.get_linesize()
+        surf = pygame.Surface((sum(widths) + 8, line_h * len(rows) + 12), pygame.SRCALPHA)
+        surf.fill((0, 0, 0, 170))
+        for y, row in enumerate(cells):
+            x = 8
+            for i, cell in enumerate(row):
+                # names are left aligned, numbers right aligned
+                offset = 0 if i == 0 else widths[i] - 12 - cell.get_width()
+                surf.blit(cell, (x + offset, 6 + y * line_h))
+                x += widths[i]
+        return surf
+
+    def dump(self, path=None):
+        """Writes every recorded frame to CSV, or JSON when the path ends in .json."""
+        path = path or self.export_path
+        if not path or not self.rows:
+            return
+        if path.endswith(".json"):
+            with open(path, "w") as f:
+                json.dump(self.rows, f)
+            return
+        columns = {}
+        for row in self.rows:
+            columns.update(dict.fromkeys(row))
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=columns, restval=0)
+            writer.writeheader()
+            writer.writerows(self.rows)
+
@@ -0,0 +1,163 @@
+import numpy as np
+
+
+# --- PROJECTILE TYPES ---
+FIRE = 0
+SOUL = 1
+
+
+# --- PROJECTILE POOL ---
+class ProjectilePool:
+    """Struct-of-arrays projectile storage; live projectiles are packed in [0, count)."""
+
+    def __init__(self, capacity=256):
+        self.pos = np.zeros((capacity, 2), dtype=np.float64)
+        self.vel = np.zeros((capacity, 2), dtype=np.float64)
+        self.radius = np.zeros(capacity, dtype=np.float64)
+        self.kind = np.zeros(capacity, dtype=np.int8)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def _reserve(self, needed):
+        capacity = len(self.radius)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ("pos", "vel", "radius", "kind"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def spawn(self, x, y, vx, vy, radius=5, kind=FIRE):
+        self._reserve(self.count + 1)
+        i = self.count
+        self.pos[i] = (x, y)
+        self.vel[i] = (vx, vy)
+        self.radius[i] = radius
+        self.kind[i] = kind
+        self.count += 1
+        return i
+
+    def positions(self):
+        return self.pos[:self.count]
+
+    def interpolated(self, alpha):
+        """Positions between the previous and the current step, for rendering between ticks."""
+        n = self.count
+        return self.pos[:n] - self.vel[:n] * (1.0 - alpha)
+
+    def kinds(self):
+        return self.kind[:self.count]
+
+    def step(self):
+        n = self.count
+        self.pos[:n] += self.vel[:n]
+
+    def hits(self, rect):
+        """Indices of projectiles whose circle overlaps rect (left, top, width, height)."""
+        n = self.count
+        if not n:
+            return np.empty(0, dtype=np.intp)
+        left, top, width, height = rect
+        pos = self.pos[:n]
+        # closest point of the rect to each circle centre
+        nearest_x = np.clip(pos[:, 0], left, left + width)
+        nearest_y = np.clip(pos[:, 1], top, top + height)
+        dist_sq = (pos[:, 0] - nearest_x) ** 2 + (pos[:, 1] - nearest_y) ** 2
+        return np.flatnonzero(dist_sq < self.radius[:n] ** 2)
+
+    def cull(self, rect):
+        """Drops projectiles whose bounds no longer touch rect and compacts the arrays."""
+        n = self.count
+        if not n:
+            return 0
+        left, top, width, height = rect
+        pos = self.pos[:n]
+        r = self.radius[:n]
+        alive = ((pos[:, 0] + r > left) & (pos[:, 0] - r < left + width) &
+                 (pos[:, 1] + r > top) & (pos[:, 1] - r < top + height))
+        return self.compact(alive)
+
+    def compact(self, alive):
+        n = self.count
+        keep = int(np.count_nonzero(alive))
+        if keep == n:
+            return 0
+        for array in (self.pos, self.vel, self.radius, self.kind):
+            array[:keep] = array[:n][alive]
+        self.count = keep
+        return n - keep
+
+    def remove(self, index):
+        # order only affects draw order, so the last projectile fills the gap
+        last = self.count - 1
+        if index != last:
+            for array in (self.pos, self.vel, self.radius, self.kind):
+                array[index] = array[last]
+        self.count = last
+
+    def clear(self):
+        self.count = 0
+
+    def snapshot(self):
+        n = self.count
+        return (self.pos[:n].copy(), self.vel[:n].copy(), self.radius[:n].copy(), self.kind[:n].copy())
+
+    def restore(self, snapshot):
+        pos, vel, radius, kind = snapshot
+        self.count = 0
+        self._reserve(len(radius))
+        n = self.count = len(radius)
+        self.pos[:n], self.vel[:n], self.radius[:n], self.kind[:n] = pos, vel, radius, kind
+
+
+# --- GLOW SPRITE CACHE ---
+class GlowCache:
+    """Pre-rendered glow sprites per projectile type, quantized by pulse level."""
+
+    def __init__(self, levels=24, low=0.2, high=1.0):
+        self.levels = levels
+        self.low = low
+        self.high = high
+        self.sprites = {}  # kind -> list of surfaces, one per pulse bucket
+        self.offsets = {}  # kind -> half size, to blit sprites centred
+
+    def add(self, kind, render):
+        """Renders render(pulse) once for every bucket between low and high."""
+        step = (self.high - self.low) / max(1, self.levels - 1)
+        frames = [render(self.low + i * step) for i in range(self.levels)]
+        self.sprites[kind] = frames
+        self.offsets[kind] = (frames[0].get_width() // 2, frames[0].get_height() // 2)
+
+    def bucket(self, pulse):
+        t = (pulse - self.low) / (self.high - self.low)
+        return min(self.levels - 1, max(0, int(round(t * (self.levels - 1)))))
+
+    def get(self, kind, pulse):
+        return self.sprites[kind][self.bucket(pulse)]
+
+    def draw(self, surface, pool, pulse, camera_x, camera_y, alpha=1.0):
+        """Blits the live projectiles of pool that overlap surface with one surface.blits call."""
+        if not len(pool):
+            return 0
+        bucket = self.bucket(pulse)
+        sprites = {kind: (frames[bucket],) + self.offsets[kind] for kind, frames in self.sprites.items()}
+        positions = pool.positions() if alpha >= 1.0 else pool.interpolated(alpha)
+        kinds = pool.kinds()
+
+        # camera-space cull: only sprites whose box reaches into the surface are blitted
+        margin = max(max(offset) for offset in self.offsets.values())
+        view_w, view_h = surface.get_size()
+        screen_pos = positions - (camera_x, camera_y)
+        visible = ((screen_pos[:, 0] > -margin) & (screen_pos[:, 0] < view_w + margin) &
+                   (screen_pos[:, 1] > -margin) & (screen_pos[:, 1] < view_h + margin))
+        batch = []
+        for (sx, sy), kind in zip(screen_pos[visible].tolist(), kinds[visible].tolist()):
+            img, half_w, half_h = sprites[kind]
+            batch.append((img, (sx - half_w, sy - half_h)))
+        surface.blits(batch, doreturn=False)
+        return len(batch)
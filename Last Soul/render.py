@@ -0,0 +1,229 @@
+import os
+import weakref
+
+import pygame
+
+
+RENDERERS = ("surface", "texture")
+# blit flags -> SDL_BlendMode for the texture backend
+BLEND_MODES = {0: 1, pygame.BLEND_RGB_ADD: 2, pygame.BLEND_RGB_MULT: 4}
+WINDOW_TITLE = "pygame window"  # what set_mode gives the window, so both backends look the same
+
+
+# --- SURFACE BACKEND ---
+class SurfaceDisplay:
+    """The original renderer: everything is blitted in software onto the display surface."""
+    name = "surface"
+
+    def __init__(self, size):
+        self.screen = pygame.display.set_mode(size)
+
+    def present(self, rects=None):
+        if rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
+
+
+# --- TEXTURE BACKEND ---
+class TextureScreen:
+    """Stands in for the screen surface on the texture backend.
+
+    Supports the Surface calls the game draws with (blit, blits, fill, get_size, ...). Every
+    source surface is uploaded as a texture the first time it is drawn and reused after that,
+    so sources must not be changed in place once drawn; subsurfaces share their parent's
+    texture. Scaling (blit_scaled) and surface alpha are applied by the renderer at draw time.
+    Drawing goes to a target texture that keeps its contents between frames, like the display
+    surface does, so partial redraws work the same on both backends.
+    """
+
+    def __init__(self, renderer, size, texture_class):
+        self.renderer = renderer
+        self.Texture = texture_class
+        self.size = size
+        self.rect = pygame.Rect((0, 0), size)
+        self.textures = weakref.WeakKeyDictionary()  # Surface -> Texture, dropped with the surface
+        self.streams = weakref.WeakKeyDictionary()   # Surface -> streaming Texture, see blit_dynamic
+        self.canvas = texture_class(renderer, size, target=True)
+        self.renderer.target = self.canvas
+        # polygons are rasterised by pygame.draw into this and streamed to the renderer
+        self.scratch = None
+        self.scratch_texture = None
+
+    def get_size(self):
+        return self.size
+
+    def get_width(self):
+        return self.size[0]
+
+    def get_height(self):
+        return self.size[1]
+
+    def get_rect(self):
+        return self.rect.copy()
+
+    def texture(self, surface):
+        texture = self.textures.get(surface)
+        if texture is None:
+            texture = self.textures[surface] = self.Texture.from_surface(self.renderer, surface)
+        return texture
+
+    def blit(self, source, dest, area=None, special_flags=0):
+        if special_flags:
+            raise ValueError("blend flags are not supported by the texture backend")
+        x, y = (int(dest[0]), int(dest[1]))
+        parent = source.get_abs_parent()
+        texture = self.texture(parent)
+        ox, oy = source.get_abs_offset()
+        src = pygame.Rect(area) if area is not None else pygame.Rect(0, 0, *source.get_size())
+        src = src.clip(source.get_rect())
+        alpha = source.get_alpha()
+        texture.alpha = 255 if alpha is None else alpha
+        dst = pygame.Rect(x, y, src.w, src.h)
+        texture.draw(srcrect=src.move(ox, oy), dstrect=dst)
+        return dst.clip(self.rect)
+
+    def blits(self, blit_sequence, doreturn=True):
+        rects = [self.blit(*item) for item in blit_sequence]
+        return rects if doreturn else None
+
+    def blit_scaled(self, source, scale, center_x, top):
+        texture = self.texture(source.get_abs_parent())
+        ox, oy = source.get_abs_offset()
+        w, h = source.get_size()
+        alpha = source.get_alpha()
+        texture.alpha = 255 if alpha is None else alpha
+        dst = pygame.Rect(0, 0, round(w * scale), round(h * scale))
+        dst.midtop = (center_x, top)
+        texture.draw(srcrect=(ox, oy, w, h), dstrect=dst)
+        return dst.clip(self.rect)
+
+    def blit_dynamic(self, source, dest, scale=1, special_flags=0):
+        """Draws a surface whose pixels change every frame: re-uploaded on each call, scaled by scale.
+
+        special_flags may be BLEND_RGB_MULT or BLEND_RGB_ADD, done with the matching SDL blend mode.
+        """
+        texture = self.streams.get(source)
+        if texture is None:
+            texture = self.streams[source] = self.Texture(self.renderer, source.get_size(), streaming=True)
+        texture.update(source)
+        texture.blend_mode = BLEND_MODES[special_flags]
+        w, h = source.get_size()
+        dst = pygame.Rect(int(dest[0]), int(dest[1]), w * scale, h * scale)
+        texture.draw(dstrect=dst)
+        return dst.clip(self.rect)
+
+    def fill(self, color, rect=None):
+        self.renderer.draw_color = tuple(color)[:3] + (255,)
+        self.renderer.fill_rect(pygame.Rect(rect) if rect is not None else self.rect)
+        return (pygame.Rect(rect) if rect is not None else self.rect).clip(self.rect)
+
+    def polygon(self, color, points, width=0):
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+        box = pygame.Rect(int(min(xs)) - 1, int(min(ys)) - 1, int(max(xs) - min(xs)) + 3, int(max(ys) - min(ys)) + 3)
+        if self.scratch is None or self.scratch.get_width() < box.w or self.scratch.get_height() < box.h:
+            size = (max(box.w, 64), max(box.h, 64))
+            self.scratch = pygame.Surface(size, pygame.SRCALPHA)
+            self.scratch_texture = self.Texture(self.renderer, size, streaming=True)
+            self.scratch_texture.blend_mode = 1  # SDL_BLENDMODE_BLEND
+        area = pygame.Rect(0, 0, box.w, box.h)
+        self.scratch.fill((0, 0, 0, 0), area)
+        pygame.draw.polygon(self.scratch, color, [(x - box.x, y - box.y) for x, y in points], width)
+        self.scratch_texture.update(self.scratch.subsurface(area), area)
+        self.scratch_texture.draw(srcrect=area, dstrect=box)
+        return box.clip(self.rect)
+
+    def present(self):
+        # copy the persistent canvas to the window
+        renderer = self.renderer
+        renderer.target = None
+        self.canvas.draw()
+        renderer.present()
+        renderer.target = self.canvas
+
+    def to_surface(self):
+        """The current frame read back into a Surface, to compare against the surface backend."""
+        return self.renderer.to_surface()
+
+
+class TextureDisplay:
+    """SDL2 Renderer/Texture backend (pygame._sdl2). driver picks the SDL render driver by name,
+    e.g. "software" or "opengl"; by default SDL chooses."""
+    name = "texture"
+
+    def __init__(self, size, driver=None):
+        from pygame._sdl2.video import Renderer, Texture, Window, get_drivers
+        # only the pulsing titles are drawn scaled; linear filtering is closest to rotozoom
+        os.environ.setdefault("SDL_RENDER_SCALE_QUALITY", "1")
+        index = -1
+        if driver:
+            names = [info.name for info in get_drivers()]
+            if driver not in names:
+                raise ValueError(f"unknown render driver {driver!r}, available: {', '.join(names)}")
+            index = names.index(driver)
+        self.window = Window(WINDOW_TITLE, size)
+        self.renderer = Renderer(self.window, index=index, target_texture=True)
+        self.screen = TextureScreen(self.renderer, size, Texture)
+
+    def present(self, rects=None):
+        # the canvas is copied whole; a GPU copy costs the same as a partial one
+        self.screen.present()
+
+
+def create_display(renderer, size, driver=None):
+    if renderer == "texture":
+        return TextureDisplay(size, driver)
+    return SurfaceDisplay(size)
+
+
+# --- NATIVE LAYER ---
+class NativeLayer:
+    """An offscreen surface at 1/scale of the screen, drawn on in native (unzoomed) pixels and
+    scaled up onto the screen with one nearest-neighbour scale.
+
+    The scaled copy is kept, so it is only redrawn and scaled again when the camera moves to
+    another native pixel or the content changes; in between, presenting it is one opaque blit.
+    """
+
+    def __init__(self, size, scale):
+        self.scale = scale
+        # one pixel for the rest of size / scale, one for the camera's offset within a native pixel
+        self.surface = pygame.Surface((size[0] // scale + 2, size[1] // scale + 2))
+        self.big = pygame.Surface((self.surface.get_width() * scale, self.surface.get_height() * scale))
+        self.offset = (0, 0)
+        self.key = None
+        self.scaled = False
+
+    def begin(self, camera_x, camera_y, content=None):
+        """Positions the layer for a (zoomed) camera. Returns the native camera position to draw
+        the layer with, or None when it already shows that position of the same content."""
+        x, y = int(camera_x) // self.scale, int(camera_y) // self.scale
+        self.offset = (x * self.scale - int(camera_x), y * self.scale - int(camera_y))
+        if self.key == (x, y, content):
+            return None
+        self.key = (x, y, content)
+        self.scaled = False
+        return x, y
+
+    def present(self, target):
+        if not self.scaled:
+            pygame.transform.scale(self.surface, self.big.get_size(), self.big)
+            self.scaled = True
+        return target.blit(self.big, self.offset)
+
+
+# --- DRAWING ---
+# the few calls that are not plain blits go through these so both backends can be used
+def draw_scaled(target, image, scale, center_x, top):
+    """Blits image scaled by scale with its top edge centred on (center_x, top); returns the rect drawn."""
+    if isinstance(target, TextureScreen):
+        return target.blit_scaled(image, scale, center_x, top)
+    image = pygame.transform.rotozoom(image, 0, scale)
+    return target.blit(image, (center_x - image.get_width() // 2, top))
+
+
+def draw_polygon(target, color, points, width=0):
+    if isinstance(target, TextureScreen):
+        return target.polygon(color, points, width)
+    return pygame.draw.polygon(target, color, points, width)
@@ -0,0 +1,124 @@
+import os
+import struct
+import sys
+import time
+
+from settings import TICK_RATE
+from world import Inputs, World, soul_frame_info
+
+
+# --- FILE FORMAT ---
+# header: magic, version, tick rate, seed, start level
+# body:   runs of (input bitmask, tick count) -- held keys make long runs, so files stay tiny
+# footer: World.state_digest() at the end of the recording
+MAGIC = b"LSRP"
+VERSION = 1
+HEADER = struct.Struct("<4sBHqB")
+SEED_RANGE = range(-2 ** 63, 2 ** 63)  # seeds the header can hold
+RUN = struct.Struct("<BH")
+FOOTER = struct.Struct("<IiiiBBI")
+MAX_RUN = 0xFFFF
+
+
+def pack_inputs(inputs):
+    mask = 0
+    for bit, pressed in enumerate(inputs):
+        if pressed:
+            mask |= 1 << bit
+    return mask
+
+
+def unpack_inputs(mask):
+    return Inputs(*((mask >> bit) & 1 == 1 for bit in range(len(Inputs._fields))))
+
+
+# --- RECORDER ---
+class InputRecorder:
+    """Collects the inputs given to World.step, one per tick, and writes them on save()."""
+
+    def __init__(self, path, world):
+        self.path = path
+        self.seed = world.seed
+        self.start_level = world.current_level
+        self.runs = []  # [mask, count]
+
+    def record(self, inputs):
+        mask = pack_inputs(inputs)
+        if self.runs and self.runs[-1][0] == mask and self.runs[-1][1] < MAX_RUN:
+            self.runs[-1][1] += 1
+        else:
+            self.runs.append([mask, 1])
+
+    def save(self, world):
+        with open(self.path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, TICK_RATE, self.seed, self.start_level))
+            for mask, count in self.runs:
+                f.write(RUN.pack(mask, count))
+            f.write(FOOTER.pack(*world.state_digest()))
+
+
+# --- PLAYBACK ---
+class Replay:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, self.tick_rate, self.seed, self.start_level = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a Last Soul replay (version {VERSION})")
+        body = data[HEADER.size:len(data) - FOOTER.size]
+        self.runs = list(RUN.iter_unpack(body))
+        self.digest = FOOTER.unpack_from(data, len(data) - FOOTER.size)
+        self.ticks = sum(count for _, count in self.runs)
+
+    def inputs(self):
+        for mask, count in self.runs:
+            inputs = unpack_inputs(mask)
+            for _ in range(count):
+                yield inputs
+
+    def new_world(self):
+        transform_frames, soul_hitbox = soul_frame_info()
+        return World(transform_frames=transform_frames, soul_hitbox=soul_hitbox,
+                     start_level=self.start_level, seed=self.seed)
+
+    def run(self, timings=True):
+        """Plays the whole log headless, as fast as possible. Returns (world, elapsed seconds)."""
+        world = self.new_world()
+        if timings:
+            world.enable_timings()
+        dt = 1.0 / self.tick_rate
+        start = time.perf_counter()
+        for inputs in self.inputs():
+            world.step(inputs, dt)
+            world.events.clear()
+        return world, time.perf_counter() - start
+
+
+def main(args):
+    # python replay.py run.lsr [repeats] -- benchmark a recorded run without a display
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    replay = Replay(args[0])
+    repeats = int(args[1]) if len(args) > 1 else 1
+    if replay.tick_rate != TICK_RATE:
+        print(f"warning: recorded at {replay.tick_rate} ticks/s, running at {TICK_RATE}")
+
+    best = None
+    for _ in range(repeats):
+        world, elapsed = replay.run()
+        if best is None or elapsed < best[1]:
+            best = (world, elapsed)
+    world, elapsed = best
+
+    print(f"{replay.ticks} ticks in {elapsed:.3f}s: {replay.ticks / elapsed:.0f} ticks/s "
+          f"({replay.ticks / replay.tick_rate / elapsed:.1f}x real time)")
+    for section, seconds in world.timings.items():
+        print(f"  {section:<12} {seconds * 1000:9.2f} ms  {seconds / replay.ticks * 1e6:7.2f} us/tick")
+    if world.state_digest() != replay.digest:
+        print(f"DESYNC: ended at {world.state_digest()}, recording ended at {replay.digest}")
+        return 1
+    print("end state matches the recording")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
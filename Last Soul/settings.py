@@ -0,0 +1,54 @@
+# --- SETTINGS ---
+WIDTH, HEIGHT = 1024, 720
+FPS = 90
+TICK_RATE = 90  # simulation steps per second, independent of FPS
+ZOOM = 3
+GRAVITY = 0.5
+MAX_FALL_SPEED = 13 * ZOOM  # px per tick: terminal velocity, one tile per tick
+JUMP_STRENGTH = -13
+PLAYER_SPEED = 3
+SOUL_SPEED = 2
+SOUL_DURATION = 2.5 # seconds
+PLAYER_RADIUS = 7 * ZOOM
+
+# --- LEVEL MANAGEMENT ---
+MAX_LEVEL = 3
+LEVEL_FADE_TIME = 0.4  # seconds to fade out at a door, and again to fade in
+AUTHORED_COLLISIONS = False  # also collide with each map's "collisions" objects (the floating platforms)
+
+# --- PROJECTILES ---
+SPAWN_INTERVAL = 1.7
+MIN_SPAWN_COUNT = 10
+MAX_SPAWN_COUNT = 17
+
+# --- AUDIO ---
+MUSIC_FADE_MS = 800  # fade out the old track, then fade in the new one
+SFX_CHANNELS = 8
+SFX_RATE_WINDOW = 0.1  # seconds
+SFX_MAX_PER_WINDOW = 2  # plays of one sound per window, the rest are dropped
+
+# --- LIGHTING ---
+LIGHTING = True                 # F4 toggles it in game
+LIGHT_SCALE = 2                 # screen px per lightmap px
+LIGHT_AMBIENT = (150, 130, 150)  # how lit the world is away from any light (255 = not darkened)
+
+# --- WORLD RENDERING ---
+NATIVE_WORLD = True  # draw the map and background at tile size and scale up once (surface backend)
+
+# --- UI SCREENS ---
+UI_FPS = 30          # menu and end screens once nothing is fading
+UI_IDLE_FPS = 10     # after UI_IDLE_TIME seconds without any input
+UI_IDLE_TIME = 5.0   # seconds
+UI_DIRTY_RECTS = True  # push only the redrawn rects with display.update; False flips the whole screen
+TEXT_CACHE_SIZE = 64   # rendered text surfaces kept; the least recently used goes first
+
+# --- WAVE BORDER ---
+WAVE_CACHE = True    # blit the border from a pre-rendered cycle; False computes the exact wave each frame
+WAVE_PHASES = 64     # frames in the pre-rendered cycle
+WAVE_MEMORY_BUDGET = 32 * 1024 * 1024  # bytes, caps WAVE_PHASES for large windows
+
+# --- EVENTS / UI TIMING ---
+THOUGHT_DURATION = 3.0  # seconds
+TIP_DURATION = 3.0  # seconds
+GAME_OVER_FADE_SPEED = 200.0  # alpha units per second
+YOU_WON_FADE_SPEED = 200.0  # same as game over
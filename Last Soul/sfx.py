@@ -0,0 +1,81 @@
+import time
+from collections import Counter, deque
+
+import pygame
+
+from settings import SFX_CHANNELS, SFX_RATE_WINDOW, SFX_MAX_PER_WINDOW
+
+
+# --- PRIORITIES ---
+# a higher priority sound may stop a lower one when every channel is busy
+SFX_PRIORITIES = {
+    "death": 3,
+    "exit_soul": 2,
+    "enter_soul": 2,
+    "mana_1": 1,
+    "mana_2": 1,
+}
+
+
+# --- SOUND EFFECTS ---
+class SoundEffects:
+    """Plays sound effects on a fixed pool of mixer channels.
+
+    Repeats of a sound within one call to play_all are coalesced into one play, and a sound
+    plays at most max_per_window times per window seconds. When all channels are busy the
+    lowest-priority one is stolen, or the new sound is dropped if nothing ranks below it.
+    """
+
+    def __init__(self, assets, channels=SFX_CHANNELS, window=SFX_RATE_WINDOW, max_per_window=SFX_MAX_PER_WINDOW,
+                 priorities=SFX_PRIORITIES):
+        self.assets = assets
+        self.channel_count = channels
+        self.window = window
+        self.max_per_window = max_per_window
+        self.priorities = priorities
+        self.channels = None  # created with the first play, once the mixer is up
+        self.channel_priority = []
+        self.channel_started = []
+        self.recent = {}  # sound name -> start times inside the rate window
+
+    def _open_channels(self):
+        pygame.mixer.set_num_channels(self.channel_count)
+        self.channels = [pygame.mixer.Channel(i) for i in range(self.channel_count)]
+        self.channel_priority = [0] * self.channel_count
+        self.channel_started = [0.0] * self.channel_count
+
+    def play_all(self, names, now=None):
+        """Plays a frame's worth of sound requests. Returns the counts of what happened to them."""
+        stats = Counter()
+        if not pygame.mixer.get_init():
+            return stats
+        if self.channels is None:
+            self._open_channels()
+        now = time.perf_counter() if now is None else now
+        requests = Counter(name for name in names if self.assets.sound(name))
+        for name in sorted(requests, key=lambda name: -self.priorities.get(name, 0)):
+            stats["coalesced"] += requests[name] - 1
+            stats[self._play(name, now)] += 1
+        return stats
+
+    def _play(self, name, now):
+        recent = self.recent.setdefault(name, deque())
+        while recent and now - recent[0] >= self.window:
+            recent.popleft()
+        if len(recent) >= self.max_per_window:
+            return "limited"
+
+        priority = self.priorities.get(name, 0)
+        result = "played"
+        index = next((i for i, channel in enumerate(self.channels) if not channel.get_busy()), None)
+        if index is None:
+            # steal the lowest priority channel, the oldest among equals
+            index = min(range(len(self.channels)), key=lambda i: (self.channel_priority[i], self.channel_started[i]))
+            if self.channel_priority[index] >= priority:
+                return "dropped"
+            result = "stolen"
+        self.channels[index].play(self.assets.sound(name))
+        self.channel_priority[index] = priority
+        self.channel_started[index] = now
+        recent.append(now)
+        return result
@@ -0,0 +1,42 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from settings import MAX_LEVEL
+
+
+# --- LEVEL STREAMING ---
+class LevelStreamer:
+    """Loads levels on a worker thread ahead of time and keeps the most recent ones around.
+
+    get(n) returns level n, waiting only if its load has not finished yet, and then starts
+    preparing level n + 1 in the background. Use get as the World's level_loader.
+    """
+
+    def __init__(self, load, capacity=MAX_LEVEL, last_level=MAX_LEVEL):
+        self.load = load
+        self.capacity = capacity
+        self.last_level = last_level
+        self.cache = OrderedDict()  # level number -> Level, least recently used first
+        self.pending = {}           # level number -> Future
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="level-loader")
+
+    def preload(self, level_num):
+        if 1 <= level_num <= self.last_level and level_num not in self.cache and level_num not in self.pending:
+            self.pending[level_num] = self.executor.submit(self.load, level_num)
+
+    def get(self, level_num):
+        if level_num in self.cache:
+            self.cache.move_to_end(level_num)
+        else:
+            future = self.pending.pop(level_num, None)
+            level = future.result() if future else self.load(level_num)
+            self.cache[level_num] = level
+            while len(self.cache) > self.capacity:
+                self.cache.popitem(last=False)
+        self.preload(level_num + 1)
+        return self.cache[level_num]
+
+    def shutdown(self):
+        for future in self.pending.values():
+            future.cancel()
+        self.executor.shutdown(wait=True)
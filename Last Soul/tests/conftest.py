@@ -0,0 +1,20 @@
+import os
+import sys
+
+# headless, and run from the game folder: asset paths are relative to it
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+GAME_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, GAME_DIR)
+os.chdir(GAME_DIR)
+
+import pygame  # noqa: E402
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def display():
+    # pytmx.load_pygame converts tile images, which needs a display surface
+    pygame.display.init()
+    yield pygame.display.set_mode((1, 1))
+    pygame.display.quit()
@@ -0,0 +1,132 @@
+import random
+
+import pygame
+import pytest
+
+from level import CollisionGrid, merge_tiles
+from level_compiler import CompiledLevel, compile_level, tmx_path
+from settings import MAX_LEVEL, ZOOM
+
+TILE = 39
+
+
+def grid(*rows):
+    """A CollisionGrid from rows of text, '#' for a solid tile."""
+    flags = bytes(char == "#" for row in rows for char in row)
+    return CollisionGrid(len(rows[0]), len(rows), TILE, TILE, flags)
+
+
+# --- SWEPT MOVE ---
+WALL = grid(
+    "..........",
+    "......#...",
+    "......#...",
+    "......#...",
+    "..........",
+)
+FLOOR = grid(
+    "...",
+    "...",
+    "...",
+    "...",
+    "...",
+    "###",
+    "...",
+    "###",
+)
+
+
+@pytest.mark.parametrize("delta", [TILE * 5, TILE * 5 + 20, TILE * 8, 1000])
+def test_move_right_stops_on_the_first_solid(delta):
+    rect = pygame.Rect(TILE, TILE * 2, 30, 37)
+    assert WALL.move(rect, delta, vertical=False)
+    assert rect.right == TILE * 6
+
+
+@pytest.mark.parametrize("delta", [-TILE * 3, -TILE * 6, -1000])
+def test_move_left_stops_on_the_first_solid(delta):
+    rect = pygame.Rect(TILE * 8, TILE * 2, 30, 37)
+    assert WALL.move(rect, delta, vertical=False)
+    assert rect.left == TILE * 7
+
+
+@pytest.mark.parametrize("delta", [TILE * 2, TILE * 4, 500])
+def test_fall_lands_on_the_first_floor(delta):
+    # the floor is one tile thick and the fall is longer, so a single step would pass it
+    rect = pygame.Rect(TILE, TILE * 3, 30, 37)
+    assert FLOOR.move(rect, delta, vertical=True)
+    assert rect.bottom == TILE * 5
+
+
+def test_jump_stops_under_the_ceiling():
+    rect = pygame.Rect(TILE, TILE * 6, 30, 37)
+    assert FLOOR.move(rect, -TILE * 3, vertical=True)
+    assert rect.top == TILE * 6
+
+
+def test_free_move_goes_the_whole_way():
+    rect = pygame.Rect(TILE, TILE * 4 + 1, 30, 37)
+    assert not WALL.move(rect, TILE * 7, vertical=False)
+    assert rect.x == TILE * 8
+    assert not WALL.move(rect, 0, vertical=False)
+    assert rect.x == TILE * 8
+
+
+# --- MERGED COLLIDERS ---
+def random_flags(rng, width, height, density):
+    return bytes(rng.random() < density for _ in range(width * height))
+
+
+def coverage(rects, width, height):
+    covered = [0] * (width * height)
+    for tx, ty, tw, th in rects:
+        assert tw > 0 and th > 0
+        assert 0 <= tx and tx + tw <= width and 0 <= ty and ty + th <= height
+        for y in range(ty, ty + th):
+            for x in range(tx, tx + tw):
+                covered[y * width + x] += 1
+    return covered
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_merge_tiles_covers_exactly_the_solid_tiles(seed):
+    rng = random.Random(seed)
+    width, height = rng.randint(1, 40), rng.randint(1, 30)
+    flags = random_flags(rng, width, height, rng.choice([0.1, 0.5, 0.9]))
+    # every solid tile once, nothing else: no gaps and no overlaps
+    assert coverage(merge_tiles(flags, width, height), width, height) == list(flags)
+
+
+@pytest.mark.parametrize("level_num", range(1, MAX_LEVEL + 1))
+def test_merge_tiles_covers_the_maps(tmp_path, level_num):
+    path = str(tmp_path / "level.lvl")
+    compile_level(tmx_path(level_num), path, ZOOM)
+    bundle = CompiledLevel(path)
+    try:
+        width, height, flags = bundle.width, bundle.height, bytes(bundle.array("SOLD", "u1"))
+    finally:
+        bundle.close()
+    rects = merge_tiles(flags, width, height)
+    assert coverage(rects, width, height) == list(flags)
+    assert len(rects) < sum(flags)
+
+
+def test_merged_colliders_push_like_single_tiles():
+    rng = random.Random(1)
+    width, height = 30, 20
+    flags = random_flags(rng, width, height, 0.35)
+    merged = CollisionGrid(width, height, TILE, TILE, flags)
+    single = CollisionGrid(width, height, TILE, TILE, flags,
+                           [pygame.Rect((i % width) * TILE, (i // width) * TILE, TILE, TILE)
+                            for i, solid in enumerate(flags) if solid])
+    moves = 0
+    while moves < 2000:
+        start = pygame.Rect(rng.randrange(width * TILE), rng.randrange(height * TILE), 30, 37)
+        if start.collidelist(single.query(start)) >= 0:
+            continue  # the player never starts a move inside a solid
+        moves += 1
+        delta = rng.randint(-3 * TILE, 3 * TILE)
+        vertical = rng.random() < 0.5
+        a, b = start.copy(), start.copy()
+        assert merged.move(a, delta, vertical) == single.move(b, delta, vertical)
+        assert a == b
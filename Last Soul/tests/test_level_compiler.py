@@ -0,0 +1,91 @@
+import os
+
+import pygame
+import pytest
+from pytmx.util_pygame import load_pygame
+
+from level import CollisionGrid, Level
+from level_compiler import HEADER, CompiledLevel, compile_level, newest_mtime, open_bundle, tmx_path
+from settings import MAX_LEVEL, ZOOM
+
+LEVELS = range(1, MAX_LEVEL + 1)
+
+
+def rects(items):
+    return [tuple(rect) for rect in items]
+
+
+def compiled(tmp_path, level_num):
+    path = str(tmp_path / f"level_{level_num}.lvl")
+    compile_level(tmx_path(level_num), path, ZOOM)
+    return path
+
+
+def rewrite_header(path, **fields):
+    # patches header fields in place, like a touched or edited source would leave them
+    names = ("magic", "version", "zoom", "digest", "mtime", "width", "height",
+             "tile_w", "tile_h", "atlas_w", "atlas_h", "count")
+    with open(path, "r+b") as f:
+        header = dict(zip(names, HEADER.unpack(f.read(HEADER.size))))
+        header.update(fields)
+        f.seek(0)
+        f.write(HEADER.pack(*(header[name] for name in names)))
+
+
+@pytest.mark.parametrize("level_num", LEVELS)
+@pytest.mark.parametrize("authored", [False, True])
+def test_bundle_matches_tmx(display, tmp_path, level_num, authored):
+    bundle = CompiledLevel(compiled(tmp_path, level_num))
+    try:
+        level = bundle.level(authored=authored)
+    finally:
+        bundle.close()
+    tmx_data = load_pygame(tmx_path(level_num))
+    expected = Level.from_tmx(tmx_data, ZOOM)
+
+    collision, other = level.collision, CollisionGrid.from_tmx(tmx_data, ZOOM, authored=authored)
+    assert (collision.width, collision.height, collision.tile_w, collision.tile_h) == \
+        (other.width, other.height, other.tile_w, other.tile_h)
+    assert collision.flags == other.flags
+    assert rects(collision.colliders) == rects(other.colliders)
+    assert level.spawn == expected.spawn
+    assert [(p.id, tuple(p.rect)) for p in level.pickups] == [(p.id, tuple(p.rect)) for p in expected.pickups]
+    assert level.pickup_bits == expected.pickup_bits
+    assert rects(level.door_objects) == rects(expected.door_objects)
+    assert rects(level.lights) == rects(expected.lights)
+
+    chunks, other_chunks = level.render.chunks, expected.render.chunks
+    assert chunks.keys() == other_chunks.keys()
+    for key, chunk in chunks.items():
+        assert pygame.image.tobytes(chunk, "RGBA") == pygame.image.tobytes(other_chunks[key], "RGBA"), key
+
+
+def test_touched_sources_keep_the_bundle(tmp_path):
+    path = compiled(tmp_path, 1)
+    rewrite_header(path, mtime=0.0)  # sources look newer, content is the same
+
+    bundle = open_bundle(path, ZOOM)
+    assert bundle is not None
+    sources = bundle.sources()
+    bundle.close()
+    # the new mtime was written back, so the next load skips the hash
+    assert CompiledLevel(path).mtime == newest_mtime(sources)
+
+
+def test_changed_sources_make_the_bundle_stale(tmp_path):
+    path = compiled(tmp_path, 1)
+    rewrite_header(path, mtime=0.0, digest=b"\0" * 20)
+    assert open_bundle(path, ZOOM) is None
+
+
+def test_other_zoom_or_version_is_not_used(tmp_path):
+    path = compiled(tmp_path, 1)
+    assert open_bundle(path, ZOOM + 1) is None
+    rewrite_header(path, version=0)
+    assert open_bundle(path, ZOOM) is None
+    with pytest.raises(ValueError):
+        CompiledLevel(path)
+
+
+def test_missing_bundle(tmp_path):
+    assert open_bundle(os.path.join(tmp_path, "nope.lvl"), ZOOM) is None
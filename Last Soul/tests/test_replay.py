@@ -0,0 +1,24 @@
+import pytest
+
+from replay import SEED_RANGE, InputRecorder, Replay, pack_inputs
+from settings import TICK_RATE
+from world import Inputs, World
+
+IDLE = Inputs(*[False] * len(Inputs._fields))
+PRESSES = [IDLE] * 3 + [IDLE._replace(right=True, jump=True)] * 5
+
+
+@pytest.mark.parametrize("seed", [0, -1, SEED_RANGE[0], SEED_RANGE[-1]])
+def test_recording_round_trips(tmp_path, seed):
+    path = str(tmp_path / "run.lsr")
+    world = World(seed=seed)
+    recorder = InputRecorder(path, world)
+    for inputs in PRESSES:
+        recorder.record(inputs)
+        world.step(inputs, 1.0 / TICK_RATE)
+    recorder.save(world)
+
+    replay = Replay(path)
+    assert (replay.tick_rate, replay.seed, replay.start_level) == (TICK_RATE, seed, world.current_level)
+    assert replay.runs == [(pack_inputs(PRESSES[0]), 3), (pack_inputs(PRESSES[-1]), 5)]
+    assert replay.digest == world.state_digest()
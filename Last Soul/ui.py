@@ -0,0 +1,204 @@
+import math
+from collections import OrderedDict
+
+import pygame
+
+
+# --- TEXT CACHE ---
+class TextCache:
+    """Bounded LRU cache of rendered text surfaces."""
+
+    def __init__(self, max_size=64):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+
+    def get(self, key, render):
+        """Returns the surface cached under key, calling render() on a miss."""
+        surf = self.surfaces.get(key)
+        if surf is not None:
+            self.surfaces.move_to_end(key)
+            return surf
+        surf = render()
+        self.surfaces[key] = surf
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)  # least recently used
+        return surf
+
+
+class Label:
+    """Holds one rendered surface and re-renders it only when its value changes."""
+
+    def __init__(self, render):
+        self.render = render
+        self.value = None
+        self.surface = None
+
+    def update(self, value):
+        if self.surface is None or value != self.value:
+            self.value = value
+            self.surface = self.render(value)
+        return self.surface
+
+
+# --- WAVE BORDER ---
+WAVE_PERIOD = 40 * math.pi  # sin(game_time / 20) repeats every 40*pi ticks
+
+
+def wave_polygons(game_time, width, height, border_size=80, points=7):
+    """Top, bottom, left and right wave polygons, each in its own surface's coordinates."""
+    offsets = [math.sin((game_time + i * 200) / 20) * 60 for i in range(points)]
+
+    top = [[0, border_size]]
+    top += [[width / points * (i + 1), border_size + offsets[i]] for i in range(points)]
+    top += [[width, border_size], [width, 0], [0, 0]]
+
+    bottom = [[0, 0]]
+    bottom += [[width / points * (i + 1), 0 - offsets[i]] for i in range(points)]
+    bottom += [[width, 0], [width, border_size], [0, border_size]]
+
+    left = [[border_size, 0]]
+    left += [[border_size + offsets[i], height / points * (i + 1)] for i in range(points)]
+    left += [[border_size, height], [0, height], [0, 0]]
+
+    right = [[0, 0]]
+    right += [[0 - offsets[i], height / points * (i + 1)] for i in range(points)]
+    right += [[0, height], [border_size, height], [border_size, 0]]
+    return top, bottom, left, right
+
+
+class WaveBorder:
+    """Wavy screen border drawn from a cycle of pre-rendered phases.
+
+    With cached=False every frame is redrawn exactly into the same four
+    surfaces, which is useful to compare against the cached output.
+    """
+
+    def __init__(self, width, height, border_size=80, color=(10, 5, 8), points=7,
+                 phases=64, memory_budget=32 * 1024 * 1024, cached=True):
+        self.width = width
+        self.height = height
+        self.border_size = border_size
+        self.color = color
+        self.points = points
+        self.cached = cached
+        self.positions = [(0, 0), (0, height - border_size), (0, 0), (width - border_size, 0)]
+        self.rects = [pygame.Rect(pos, size) for pos, size in zip(self.positions, self._sizes())]
+
+        # the polygons are a single opaque colour, so 8-bit colorkeyed surfaces are exact
+        self.phase_bytes = 2 * width * border_size + 2 * border_size * height
+        self.phases = max(1, min(phases, memory_budget // self.phase_bytes))
+        self.frames = {}  # phase -> four surfaces, rendered on first use
+        # the exact path reuses these per-pixel-alpha surfaces instead of allocating new ones
+        self.scratch = [pygame.Surface(size, pygame.SRCALPHA) for size in self._sizes()]
+
+    def _sizes(self):
+        return [(self.width, self.border_size)] * 2 + [(self.border_size, self.height)] * 2
+
+    def _new_surfaces(self):
+        surfaces = []
+        for size in self._sizes():
+            surf = pygame.Surface(size, 0, 8)
+            surf.set_palette_at(0, (0, 0, 0))
+            surf.set_palette_at(1, self.color)
+            surf.set_colorkey(0, pygame.RLEACCEL)
+            surfaces.append(surf)
+        return surfaces
+
+    def _render(self, surfaces, game_time, color=1, clear=0):
+        polygons = wave_polygons(game_time, self.width, self.height, self.border_size, self.points)
+        for surf, polygon in zip(surfaces, polygons):
+            surf.fill(clear)
+            pygame.draw.polygon(surf, color, polygon)
+        return surfaces
+
+    def phase(self, game_time):
+        return int((game_time % WAVE_PERIOD) / WAVE_PERIOD * self.phases) % self.phases
+
+    def _frame(self, phase):
+        surfaces = self.frames.get(phase)
+        if surfaces is None:
+            surfaces = self._render(self._new_surfaces(), phase * WAVE_PERIOD / self.phases)
+            self.frames[phase] = surfaces
+        return surfaces
+
+    def draw(self, surface, game_time):
+        if self.cached:
+            surfaces = self._frame(self.phase(game_time))
+        else:
+            surfaces = self._render(self.scratch, game_time, self.color, (0, 0, 0, 0))
+        surface.blits(zip(surfaces, self.positions), doreturn=False)
+
+
+# --- PARTIAL REDRAW ---
+class DirtyScreen:
+    """Screen updates for mostly static screens (menu, game over, you won).
+
+    begin(key, compose) draws the static part once per key into a background surface and
+    puts it on screen. Every later frame only the regions passed to restore() or drawn with
+    draw() are touched, and update() hands just those to present(rects) (by default
+    pygame.display.update). Anything drawn is erased from the background again at the next
+    begin(). With enabled=False the whole screen is presented every frame instead, which
+    gives the same picture.
+    """
+
+    def __init__(self, surface, present=None, enabled=True):
+        self.surface = surface
+        self.present = present or self._present
+        self.enabled = enabled
+        self.key = None
+        self.background = None
+        self.dirty = []
+        self.drawn = []  # regions drawn over the background last frame
+
+    def begin(self, key, compose):
+        """Returns True when the background was (re)composed and the whole screen redrawn."""
+        if key != self.key:
+            self.key = key
+            # a new surface each time: renderers that cache uploaded surfaces never see a stale one
+            self.background = pygame.Surface(self.surface.get_size())
+            compose(self.background)
+            self.surface.blit(self.background, (0, 0))
+            self.dirty = [self.surface.get_rect()]
+            self.drawn = []
+            return True
+        drawn, self.drawn = self.drawn, []
+        self.restore(drawn)
+        return False
+
+    def invalidate(self):
+        # the screen was drawn by something else; the next begin() starts from scratch
+        self.key = None
+
+    def restore(self, rects):
+        for rect in rects:
+            self.surface.blit(self.background, rect, rect)
+        self.dirty += rects
+
+    def add(self, rect):
+        """Marks rect as drawn over the background this frame."""
+        if rect:
+            self.drawn.append(rect)
+            self.dirty.append(rect)
+
+    def redraw_all(self):
+        # the whole screen was drawn directly this frame
+        self.invalidate()
+        self.dirty = [self.surface.get_rect()]
+        self.drawn = []
+
+    def update(self):
+        """Pushes this frame's dirty regions to the display; returns how many there were."""
+        count = len(self.dirty)
+        if not self.enabled:
+            self.present()
+        elif self.dirty:
+            self.present(self.dirty)
+        self.dirty = []
+        return count
+
+    @staticmethod
+    def _present(rects=None):
+        if rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
@@ -0,0 +1,403 @@
+import math
+import os
+import random
+import sys
+import time
+from collections import namedtuple
+
+import pygame
+
+from assets import ANIMATION_DIR, ANIMATIONS, frame_files
+from entities import Door, Player
+from level_compiler import load_compiled_level
+from projectiles import FIRE, ProjectilePool
+from settings import (WIDTH, HEIGHT, ZOOM, TICK_RATE, GRAVITY, MAX_FALL_SPEED, JUMP_STRENGTH, PLAYER_SPEED,
+                      SOUL_SPEED, SOUL_DURATION, PLAYER_RADIUS, MAX_LEVEL, LEVEL_FADE_TIME, SPAWN_INTERVAL,
+                      MIN_SPAWN_COUNT, MAX_SPAWN_COUNT, THOUGHT_DURATION, GAME_OVER_FADE_SPEED,
+                      YOU_WON_FADE_SPEED)
+
+PLAYER_HITBOX = (int(PLAYER_RADIUS * 1.6), int(PLAYER_RADIUS * 1.8))  # body form; the soul's comes from its frames
+
+
+# --- INPUTS ---
+Inputs = namedtuple("Inputs", "left right up down jump transform restart")
+NO_INPUTS = Inputs(False, False, False, False, False, False, False)
+
+
+def inputs_from_keys(keys):
+    return Inputs(
+        left=bool(keys[pygame.K_a]),
+        right=bool(keys[pygame.K_d]),
+        up=bool(keys[pygame.K_w]),
+        down=bool(keys[pygame.K_s]),
+        jump=bool(keys[pygame.K_SPACE]),
+        transform=bool(keys[pygame.K_DOWN]),
+        restart=bool(keys[pygame.K_r]),
+    )
+
+
+# --- SOUL FRAMES ---
+SOUL_FRAMES_FOLDER = os.path.join(ANIMATION_DIR, "player_soul")
+
+
+def soul_frame_info(folder=SOUL_FRAMES_FOLDER, scale=ANIMATIONS["player_soul"]["scale"]):
+    """Number of transformation frames and the soul hitbox, read without a display."""
+    files = frame_files(folder)
+    if not files:
+        return 0, None
+    width, height = pygame.image.load(files[0]).get_size()
+    return len(files), (width * scale // 2, height * scale // 2)
+
+
+# --- WORLD ---
+class World:
+    """Game simulation advanced by step(inputs, dt) at a fixed tick rate; never draws."""
+
+    def __init__(self, level_loader=None, transform_frames=0, soul_hitbox=None, start_level=1, seed=None):
+        self.level_loader = level_loader or (lambda n: load_compiled_level(n, ZOOM, render=False))
+        # all gameplay randomness comes from this generator, so a seed plus inputs replays a run exactly
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.rng = random.Random(self.seed)
+        self.timings = None  # section -> seconds, filled by step() once enable_timings() is called
+        self.transform_frames = transform_frames
+        self.soul_hitbox = soul_hitbox
+        self.projectiles = ProjectilePool()
+        # level number -> bitset of collected pickups (bit = level.pickup_bits[Pickup.id]); kept across retries
+        self.collected_mana = {}
+        self.events = []  # sound / state events for the frontend, drained every frame
+        self.time = 0.0   # game clock in seconds, advanced only by step()
+        self.ticks = 0
+
+        self.player = Player(WIDTH // 2, HEIGHT // 2)
+        self.camera_x, self.camera_y = 0, 0
+
+        # event flags
+        self.start_pause = True
+        self.event_after_first_soul = False
+        self.first_soul_done = False
+        self.thought_active = False
+        self.thought_start_time = 0
+        self.thought_shown_after_first_soul = False
+        self.tip_start_time = 0
+
+        # end screens
+        self.game_over = False
+        self.game_over_alpha = 0.0
+        self.you_won = False
+        self.you_won_alpha = 0.0
+
+        # door transition: fade out, swap the level in, fade back in while play resumes
+        self.next_level = None
+        self.fade_alpha = 0.0
+
+        self.spawn_timer = 0.0
+        self.level = None
+        self.level_num = None
+        self.current_level = start_level
+        self.load_level(start_level)
+
+    def load_level(self, level_num):
+        # levels are never modified by play, so a retry only resets state and never touches the disk
+        if level_num != self.level_num:
+            self.level = self.level_loader(level_num)
+            self.level_num = level_num
+        player = self.player
+        player.x, player.y = self.level.spawn or (WIDTH // 2, HEIGHT // 2)
+        player.prev_x, player.prev_y = player.x, player.y  # no interpolation across a teleport
+        self.door_objects = [Door(rect.copy(), level_num + 1) for rect in self.level.door_objects]
+        self.events.append("level_loaded")
+
+    def visible_pickups(self, rect):
+        """Uncollected pickups of the current level near rect, looked up in the level's spatial index."""
+        pickups, bits = self.level.pickups, self.level.pickup_bits
+        collected = self.collected_mana.get(self.level_num, 0)
+        for index in self.level.pickup_index.query(rect):
+            pickup = pickups[index]
+            if not collected >> bits[pickup.id] & 1:
+                yield pickup
+
+    def interpolated_position(self, alpha):
+        p = self.player
+        return p.prev_x + (p.x - p.prev_x) * alpha, p.prev_y + (p.y - p.prev_y) * alpha
+
+    def start_transform(self):
+        self.player.transforming = True
+        self.player.transform_frame = 0
+        self.player.mana -= 1
+        self.events.append("enter_soul")
+
+    def spawn_projectile(self, target_x, target_y, min_dist=180, max_dist=260, speed_base=3.0, kind=FIRE):
+        angle = self.rng.uniform(0, math.tau)  # spawn direction
+        dist = self.rng.uniform(min_dist, max_dist)
+        spawn_x = target_x + math.cos(angle) * dist
+        spawn_y = target_y + math.sin(angle) * dist
+
+        # calculate velocity toward the player's position at spawn time
+        dx = target_x - spawn_x
+        dy = target_y - spawn_y
+        length = math.hypot(dx, dy) or 1.0
+        dx /= length
+        dy /= length
+
+        # make them slightly faster and a bit varied
+        speed = speed_base * 1.3 * self.rng.uniform(0.9, 1.15)  # ~30% faster
+        self.projectiles.spawn(spawn_x, spawn_y, dx * speed, dy * speed, radius=5, kind=kind)
+
+    def update_projectiles(self):
+        # move everything in one batch, drop what left the screen, then test the player
+        world_screen_rect = (self.camera_x - 32, self.camera_y - 32, WIDTH + 64, HEIGHT + 64)  # margin
+        self.projectiles.step()
+        self.projectiles.cull(world_screen_rect)
+
+        hits = self.projectiles.hits(self.player.rect)
+        if len(hits):
+            return int(hits[0])
+        return None
+
+    def reset_player(self):
+        self.projectiles.clear()
+        self.player.is_soul = False
+        self.player.transforming = False
+        self.player.soul_timer = 0
+
+    def state_digest(self):
+        """A few integers summing up the run so far, used to check that a replay matched its recording."""
+        return (self.ticks, int(self.player.x), int(self.player.y), self.player.mana,
+                self.current_level, int(self.game_over), len(self.projectiles))
+
+    def enable_timings(self):
+        self.timings = dict.fromkeys(("input", "collision", "pickups", "spawn", "projectiles", "transform"), 0.0)
+
+    def _lap(self, section):
+        # adds the time since the previous lap to section; a no-op unless timings are enabled
+        if self.timings is not None:
+            now = time.perf_counter()
+            self.timings[section] += now - self._lap_start
+            self._lap_start = now
+
+    def snapshot(self):
+        """Copies everything step() can change; restore() puts it back. The level itself is shared."""
+        state = dict(vars(self))
+        for name in ("level", "level_loader", "timings", "player", "projectiles", "rng"):
+            del state[name]
+        state["events"] = list(self.events)
+        state["door_objects"] = list(self.door_objects)
+        state["collected_mana"] = dict(self.collected_mana)
+        return (state, self.level, self.player.snapshot(), self.projectiles.snapshot(), self.rng.getstate())
+
+    def restore(self, snapshot):
+        state, level, player, projectiles, rng = snapshot
+        vars(self).update(state)
+        self.events = list(state["events"])
+        self.door_objects = list(state["door_objects"])
+        self.collected_mana = dict(state["collected_mana"])
+        self.level = level
+        self.player.restore(player)
+        self.projectiles.restore(projectiles)
+        self.rng.setstate(rng)
+
+    def step(self, inputs, dt=1.0 / TICK_RATE):
+        self.player.prev_x, self.player.prev_y = self.player.x, self.player.y
+        if self.timings is not None:
+            self._lap_start = time.perf_counter()
+        self._step(inputs, dt)
+        self.time += dt
+        self.ticks += 1
+
+    def _step(self, inputs, dt):
+        p = self.player
+        # --- GAME OVER ---
+        if self.game_over:
+            if inputs.restart:
+                self.game_over = False
+                self.game_over_alpha = 0.0
+                self.load_level(self.current_level)
+                self.reset_player()
+                self.events.append("retry")
+                return
+            self.game_over_alpha = min(255.0, self.game_over_alpha + GAME_OVER_FADE_SPEED * dt)
+            return
+
+        # --- LEVEL TRANSITION ---
+        fade_step = 255.0 * dt / LEVEL_FADE_TIME
+        if self.next_level is not None:
+            self.fade_alpha = min(255.0, self.fade_alpha + fade_step)
+            p.soul_timer += dt  # the soul does not burn out while the screen is dark
+            if self.fade_alpha >= 255.0:
+                self.load_level(self.next_level)
+                self.next_level = None
+            return
+        if self.fade_alpha > 0.0:
+            self.fade_alpha = max(0.0, self.fade_alpha - fade_step)
+
+        # --- START PAUSE ---
+        if self.start_pause:
+            p.dx = p.dy = 0
+            p.vel_y = 0
+            p.on_ground = False
+            self.camera_x, self.camera_y = p.x - WIDTH // 2, p.y - HEIGHT // 2
+            if inputs.transform and p.mana > 0:
+                self.start_transform()
+                self.start_pause = False
+                self.first_soul_done = True
+            return
+
+        # --- NORMAL INPUT ---
+        dx = dy = 0
+        if not p.transforming:
+            if p.is_soul:
+                if inputs.left: dx -= SOUL_SPEED
+                if inputs.right: dx += SOUL_SPEED
+                if inputs.up: dy -= SOUL_SPEED
+                if inputs.down: dy += SOUL_SPEED
+
+                if self.time - p.soul_timer > SOUL_DURATION:
+                    p.is_soul = False
+
+                    # Trigger thought after first soul ends
+                    if self.first_soul_done and not self.thought_shown_after_first_soul:
+                        self.thought_active = True
+                        self.thought_start_time = self.time
+                        self.thought_shown_after_first_soul = True
+            else:
+                if inputs.left: dx -= PLAYER_SPEED
+                if inputs.right: dx += PLAYER_SPEED
+                if inputs.jump and p.on_ground:
+                    p.vel_y = JUMP_STRENGTH
+                    p.on_ground = False
+                p.vel_y = min(p.vel_y + GRAVITY, MAX_FALL_SPEED)
+                dy = p.vel_y
+                if inputs.transform and p.mana > 0:
+                    self.start_transform()
+
+                    # Trigger thought if mana now zero (first transformation used)
+                    if p.mana == 0:
+                        self.thought_active = True
+                        self.thought_start_time = self.time
+        p.dx, p.dy = dx, dy
+        self._lap("input")
+
+        # --- COLLISIONS ---
+        if p.is_soul and self.soul_hitbox:
+            hitbox_width, hitbox_height = self.soul_hitbox
+        else:
+            hitbox_width, hitbox_height = PLAYER_HITBOX
+        player_rect = pygame.Rect(p.x - hitbox_width // 2, p.y - hitbox_height // 2,
+                                  hitbox_width, hitbox_height)
+        collision = self.level.collision
+
+        # swept along x, then y: only the tiles along the path are tested, substepped per tile
+        collision.move(player_rect, dx, vertical=False)
+        p.on_ground = False
+        if collision.move(player_rect, dy, vertical=True):
+            if not p.is_soul: p.vel_y = 0
+            if dy > 0: p.on_ground = True
+
+        p.rect = player_rect
+        p.x, p.y = player_rect.centerx, player_rect.centery
+        self.camera_x, self.camera_y = p.x - WIDTH // 2, p.y - HEIGHT // 2
+        self._lap("collision")
+
+        # --- MANA COLLECTION ---
+        for pickup in self.visible_pickups(player_rect):
+            if player_rect.colliderect(pickup.rect):
+                p.mana += pickup.value
+                self.events.append("mana_1")
+                self.events.append("mana_2")
+                self.collected_mana[self.level_num] = self.collected_mana.get(self.level_num, 0) | 1 << self.level.pickup_bits[pickup.id]
+
+        # --- DOOR ---
+        for door in list(self.door_objects):
+            if player_rect.colliderect(door.rect):
+                self.current_level = door.target
+                if self.current_level > MAX_LEVEL:
+                    self.you_won = True  # trigger the "You Won" screen
+                else:
+                    self.next_level = self.current_level
+
+        self._lap("pickups")
+
+        # --- YOU WON ---
+        if self.you_won:
+            if inputs.restart:
+                self.you_won = False
+                self.you_won_alpha = 0.0
+                self.current_level = 1
+                self.collected_mana.clear()  # a new run starts with every orb back
+                self.load_level(self.current_level)
+                self.reset_player()
+                self.events.append("restart")
+            self.you_won_alpha = min(255.0, self.you_won_alpha + YOU_WON_FADE_SPEED * dt)
+            return
+
+        # --- SPAWN PROJECTILES ---
+        self.spawn_timer += dt
+        if self.spawn_timer >= SPAWN_INTERVAL:
+            self.spawn_timer = 0.0
+            count = self.rng.randint(MIN_SPAWN_COUNT, MAX_SPAWN_COUNT)
+            for _ in range(count):
+                self.spawn_projectile(p.x, p.y, min_dist=400, max_dist=600, speed_base=2.0)
+        self._lap("spawn")
+
+        # --- UPDATE PROJECTILES ---
+        hit = self.update_projectiles()
+        if hit is not None:
+            self.events.append("death")
+            if p.is_soul:
+                p.is_soul = False
+                p.transforming = False
+                p.soul_timer = 0
+                self.projectiles.remove(hit)
+                self.events.append("exit_soul")
+            else:
+                self.game_over = True
+                self.game_over_alpha = 0.0
+                self.projectiles.clear()
+        self._lap("projectiles")
+
+        # --- TRANSFORMATION ---
+        if p.transforming:
+            if int(p.transform_frame) < self.transform_frames:
+                p.transform_frame += 0.25
+            else:
+                p.transforming = False
+                p.is_soul = True
+                p.soul_timer = self.time
+                if self.first_soul_done and not self.event_after_first_soul:
+                    self.event_after_first_soul = True
+                    self.tip_start_time = self.time
+
+        if self.thought_active and self.time - self.thought_start_time >= THOUGHT_DURATION:
+            self.thought_active = False
+        self._lap("transform")
+
+
+# --- HEADLESS ---
+def run_headless(ticks, inputs=None, world=None):
+    """Steps a display-less world as fast as possible; inputs(tick) returns the Inputs for each tick."""
+    if world is None:
+        transform_frames, soul_hitbox = soul_frame_info()
+        world = World(transform_frames=transform_frames, soul_hitbox=soul_hitbox)
+    dt = 1.0 / TICK_RATE
+    for tick in range(ticks):
+        world.step(inputs(tick) if inputs else NO_INPUTS, dt)
+        world.events.clear()
+    return world
+
+
+def demo_inputs(tick):
+    """Scripted input for smoke runs: transform once, then run back and forth jumping, retrying on death."""
+    phase = (tick // (TICK_RATE * 2)) % 2
+    return Inputs(left=phase == 1, right=phase == 0, up=False, down=False,
+                  jump=tick % 45 == 0, transform=tick < 2, restart=True)
+
+
+if __name__ == "__main__":
+    # python world.py [ticks] -- simulate without opening a window
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else TICK_RATE * 60
+    start = time.perf_counter()
+    world = run_headless(ticks, demo_inputs)
+    elapsed = time.perf_counter() - start
+    print(f"{ticks} ticks in {elapsed:.3f}s ({ticks / elapsed:.0f} ticks/s, "
+          f"{ticks / TICK_RATE / elapsed:.1f}x real time)")